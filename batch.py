@@ -0,0 +1,85 @@
+from players import ComputerPlayer
+from probability import odds_by_rank
+
+
+def batchable(player):
+    """ players that choose like ComputerPlayer from odds that only depend on the hand """
+    return type(player).choose is ComputerPlayer.choose and player.cache is not None and player.frontier is None
+
+
+def choose_many(decisions):
+    """
+    Chooses for many computer players at once, each as its choose(bid) would.
+
+    The odds of every distinct situation in the batch are looked up or scored once, so
+    tables that share a situation share the work; only the pick between the raises is
+    left per player, drawn from the player's own random stream.
+
+    Parameters:
+    - decisions (list): (player, bid) pairs, one per table.
+
+    Returns:
+    - list: 'Liar!' or a (quantity, face) tuple for every decision, in order.
+    """
+    choices = [None] * len(decisions)
+    situations = {}
+    for index, (player, bid) in enumerate(decisions):
+        if not batchable(player):
+            choices[index] = player.choose(bid)
+        elif bid.rank == bid.NO_BID:
+            choices[index] = player.new_bid_count_and_face()
+        else:
+            situations.setdefault(player.odds_key(bid), []).append(index)
+
+    for key, indices in situations.items():
+        cache = decisions[indices[0]][0].cache
+        odds = cache.get(key)
+        if odds is None:
+            odds = odds_by_rank(*key)
+            cache.put(key, odds)
+        for index in indices:
+            player, bid = decisions[index]
+            choices[index] = player.choose_from_odds(bid, odds)
+    return choices
+
+
+def decide_many(decisions):
+    """ decides for many computer players at once and returns what each decide(bid) would """
+    return [player.apply_choice(bid, choice) for (player, bid), choice in zip(decisions, choose_many(decisions))]
+
+
+def run_games(games):
+    """
+    Plays many headless games side by side and returns their winners.
+
+    Every step takes one turn at each unfinished table, and the computer turns of all tables
+    are decided in one batch. Every game keeps its own random streams, so it ends exactly as
+    Game.run() would have played it. Players that record stats or aren't computers take
+    their turn on their own.
+    """
+    bids = [game.new_bid() for game in games]
+    winners = [None] * len(games)
+    playing = range(len(games))
+    while playing:
+        turns = []
+        decisions = []
+        for index in playing:
+            game, bid = games[index], bids[index]
+            player = game.next_player(bid)
+            if player is None:
+                winners[index] = game.players[0]
+            elif getattr(player, 'is_computer', False) and player.stats is None:
+                player.renderer.turn_started(player, bid)
+                decisions.append((player, bid))
+                turns.append((index, player, True))
+            else:
+                turns.append((index, player, False))
+
+        results = iter(decide_many(decisions))
+        for index, player, batched in turns:
+            bid = bids[index]
+            challenged = player.finish_turn(bid, next(results)) if batched else player.take_turn(bid)
+            games[index].resolve_turn(bid, player, challenged)
+
+        playing = [index for index, _, _ in turns]
+    return winners
@@ -0,0 +1,88 @@
+from probability import binomial_pmf, face_odds
+
+
+def convolve(left, right):
+    """ the distribution of the sum of two independent counts """
+    result = [0.0] * (len(left) + len(right) - 1)
+    for i, a in enumerate(left):
+        if a:
+            for j, b in enumerate(right):
+                result[i + j] += a * b
+    return result
+
+
+class BeliefModel:
+    """
+    A posterior over how many dice matching each face the other players hold, read from their bids.
+
+    Every opponent's count of dice matching a face starts from the uniform prior, Binomial(n, p).
+    A bid on a face is taken as evidence that the bidder holds more of it: the posterior is
+    multiplied by a likelihood proportional to (count + trust), so a smaller trust reads more
+    into each bid. Only the opponent and face of each new bid are updated, in O(n), and the
+    model starts over when the round changes.
+
+    Attributes:
+    - owner (BasePlayer): The player holding the beliefs, whose own bids are ignored.
+    - trust (float): How little a single bid moves the posterior.
+
+    Methods:
+    - update(bid): Reads the bids placed since the last update.
+    - tail(face, unknown_dices, is_wild): P(at least k unknown dice match the face) for k in 0..n + 1.
+    """
+
+    def __init__(self, owner, trust=5.0):
+        self.owner = owner
+        self.trust = trust
+        self._round = None
+        self._seen = 0
+        # (opponent, face) -> (number of dice, posterior over the matching count)
+        self._posteriors = {}
+        # face -> tail, cleared whenever a posterior changes
+        self._tails = {}
+
+    def update(self, bid):
+        if bid.round != self._round:
+            self._round = bid.round
+            self._seen = 0
+            self._posteriors = {}
+            self._tails = {}
+
+        for rank, player in bid.history[self._seen:]:
+            if player is not self.owner:
+                self._observe(player, bid.decode(rank)[1])
+        self._seen = len(bid.history)
+
+    def _observe(self, player, face):
+        number_of_dices = player.cup.number_of_dices
+        key = (player, face)
+        if key in self._posteriors:
+            posterior = self._posteriors[key][1]
+        else:
+            posterior = binomial_pmf(number_of_dices, face_odds(face, self.owner.is_wild))
+
+        weighted = [p * (count + self.trust) for count, p in enumerate(posterior)]
+        total = sum(weighted)
+        self._posteriors[key] = (number_of_dices, [p / total for p in weighted])
+        self._tails.pop(face, None)
+
+    def tail(self, face, unknown_dices, is_wild):
+        if face in self._tails:
+            return self._tails[face]
+
+        # the opponents without evidence on this face share one binomial
+        distribution = [1.0]
+        rest = unknown_dices
+        for (player, posterior_face), (number_of_dices, posterior) in self._posteriors.items():
+            if posterior_face == face:
+                distribution = convolve(distribution, posterior)
+                rest -= number_of_dices
+        distribution = convolve(distribution, binomial_pmf(max(rest, 0), face_odds(face, is_wild)))
+
+        tail = [0.0] * (len(distribution) + 1)
+        for k in range(len(distribution) - 1, -1, -1):
+            tail[k] = tail[k + 1] + distribution[k]
+        tail[0] = 1.0
+        tail = [min(value, 1.0) for value in tail]
+
+        self._tails[face] = tail
+        return tail
@@ -0,0 +1,233 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import timeit
+
+from batch import decide_many
+from cache import decision_cache
+from game import Game
+from items import Bid
+from players import AnytimeComputerPlayer, ComputerPlayer
+from renderers import NullRenderer
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+SEED = 2024
+REPEAT = 5
+# every measurement runs at least this long, in seconds
+MIN_TIME = 0.05
+
+CONFIGS = [(players, dices, is_wild)
+           for players in range(2, 7)
+           for dices in range(2, 6)
+           for is_wild in (False, True)]
+
+# party tables, for the decisions that should cost the same however many dice are in play
+LARGE_CONFIGS = [(players, 20, is_wild)
+                 for players in (10, 50, 100, 200)
+                 for is_wild in (False, True)]
+
+
+def config_name(players, dices, is_wild):
+    return f"{players}p{dices}d{'-wild' if is_wild else ''}"
+
+
+def new_game(players, dices, is_wild, seed=SEED, player_class=ComputerPlayer):
+    """ a seeded headless game with computer players, profiles repeat beyond five players """
+    profiles = list(ComputerPlayer.gambler)
+    game = Game(renderer=NullRenderer(), seed=seed)
+    game.seat_players([player_class(name=profiles[i % len(profiles)], number_of_dices=dices)
+                       for i in range(players)], is_wild)
+    return game
+
+
+def decision(players, dices, is_wild, player_class=ComputerPlayer, seed=SEED):
+    """ a computer player facing a bid of a sixth of the dice in play on 3's """
+    game = new_game(players, dices, is_wild, seed, player_class)
+    bid = Bid(players * dices)
+    bid.place_bid(max(1, bid.total_dices // 6), 3, game.players[-1])
+    player = game.players[0]
+    player.total_dices = bid.total_dices
+    return player, bid
+
+
+def bench_calculate_bid_proba(players, dices, is_wild):
+    player, bid = decision(players, dices, is_wild)
+    return lambda: player.calculate_bid_proba(bid.count, bid.face)
+
+
+def bench_simulate_bid_proba(players, dices, is_wild):
+    player, bid = decision(players, dices, is_wild)
+    return lambda: player.simulate_bid_proba(bid.count, bid.face, 1000)
+
+
+def bench_generate_combinations(players, dices, is_wild):
+    player, bid = decision(players, dices, is_wild)
+    return lambda: list(player.generate_combinations(bid))
+
+
+def bench_generate_probabilities(players, dices, is_wild):
+    player, bid = decision(players, dices, is_wild)
+    return lambda: player.generate_probabilities(player.generate_combinations(bid))
+
+
+def bench_decide(players, dices, is_wild, player_class=ComputerPlayer, frontier=None, cached=False):
+    player, bid = decision(players, dices, is_wild, player_class)
+    player.frontier = frontier
+    if not cached:
+        # every call repeats the same situation, the shared cache would answer all but the first
+        player.cache = None
+    rank, last_rank, history = bid.rank, bid.last_rank, list(bid.history)
+    player.rng = random.Random(SEED)
+    # always take the expensive path, scoring every raise
+    player.gambler_threshold = 0.0
+
+    def run():
+        # decide places a bid, so every call starts from the same one
+        bid.rank, bid.last_rank, bid.history = rank, last_rank, list(history)
+        player.decide(bid)
+    return run
+
+
+def bench_decide_many(players, dices, is_wild, tables=50):
+    """ one batch of decisions from as many tables, reported per decision """
+    decisions = [decision(players, dices, is_wild, seed=SEED + table) for table in range(tables)]
+    for player, _ in decisions:
+        player.gambler_threshold = 0.0
+    starts = [(bid.rank, bid.last_rank, list(bid.history)) for _, bid in decisions]
+
+    def run():
+        for (_, bid), (rank, last_rank, history) in zip(decisions, starts):
+            bid.rank, bid.last_rank, bid.history = rank, last_rank, list(history)
+        # score every situation of the batch again instead of reading the last run's odds
+        decision_cache.clear()
+        decide_many(decisions)
+    run.calls = tables
+    return run
+
+
+def bench_decide_cached(players, dices, is_wild):
+    """ a decision answered from the decision cache """
+    return bench_decide(players, dices, is_wild, cached=True)
+
+
+def bench_anytime_decide(players, dices, is_wild):
+    return bench_decide(players, dices, is_wild, AnytimeComputerPlayer)
+
+
+def bench_frontier_decide(players, dices, is_wild):
+    return bench_decide(players, dices, is_wild, frontier=Game.large_table_frontier)
+
+
+def bench_dice_counter(players, dices, is_wild):
+    game = new_game(players, dices, is_wild)
+    all_dice = [face for player in game.players for face in player.cup.hand]
+    return lambda: Bid.dice_counter(all_dice)
+
+
+def bench_game_round(players, dices, is_wild):
+    """ times whole seeded games, reported per round """
+    seeds = iter(range(SEED, SEED + 10 ** 9))
+    rounds = []
+
+    def run():
+        game = new_game(players, dices, is_wild, next(seeds))
+        game.run()
+        rounds.append(game.turn)
+    run.per = rounds
+    return run
+
+
+BENCHMARKS = {
+    'calculate_bid_proba': bench_calculate_bid_proba,
+    'simulate_bid_proba': bench_simulate_bid_proba,
+    'generate_combinations': bench_generate_combinations,
+    'generate_probabilities': bench_generate_probabilities,
+    'decide': bench_decide,
+    'decide_cached': bench_decide_cached,
+    'decide_many': bench_decide_many,
+    'anytime_decide': bench_anytime_decide,
+    'frontier_decide': bench_frontier_decide,
+    'dice_counter': bench_dice_counter,
+    'game_round': bench_game_round,
+}
+
+
+def measure(function):
+    """ the best time per call, or per decision of a batch, in seconds, over REPEAT runs of at least MIN_TIME each """
+    timer = timeit.Timer(function)
+    number = 1
+    while timer.timeit(number) < MIN_TIME:
+        number *= 2
+    rounds = getattr(function, 'per', None)
+    if rounds is not None:
+        rounds.clear()
+    best = min(timer.repeat(REPEAT, number)) / number / getattr(function, 'calls', 1)
+    if rounds:
+        # scale the time per game down to the time per round
+        best *= len(rounds) / sum(rounds)
+    return best
+
+
+def run(names=None, configs=CONFIGS):
+    results = {}
+    for name, factory in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        for config in configs:
+            key = f"{name}/{config_name(*config)}"
+            results[key] = measure(factory(*config))
+            print(f"  {key:<42} {results[key] * 1e6:12.1f} us", flush=True)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """ returns the benchmarks that got slower than the baseline by more than the threshold """
+    regressions = {}
+    for key, seconds in results.items():
+        before = baseline.get(key)
+        if before and seconds > before * (1 + threshold):
+            regressions[key] = seconds / before
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the AI decision and game-loop hot paths.")
+    parser.add_argument('benchmarks', nargs='*', help=f"the benchmarks to run, all by default: {', '.join(BENCHMARKS)}")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save', action='store_true', help="store the results as the new baseline")
+    parser.add_argument('--large', action='store_true', help="run on party tables of 10 to 200 players instead")
+    parser.add_argument('--threshold', type=float, default=0.3,
+                        help="flag benchmarks slower than the baseline by more than this fraction")
+    args = parser.parse_args()
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    results = run(args.benchmarks, LARGE_CONFIGS if args.large else CONFIGS)
+
+    if args.save:
+        with open(args.baseline, 'w') as file:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(), 'results': results},
+                      file, indent=2, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare with, run with --save to store one.")
+        return
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)['results']
+    regressions = compare(results, baseline, args.threshold)
+    for key, ratio in sorted(regressions.items(), key=lambda x: x[1], reverse=True):
+        print(f"REGRESSION {key}: {ratio:.2f}x the baseline")
+    if regressions:
+        sys.exit(1)
+    print(f"No regressions beyond {args.threshold:.0%} of the baseline.")
+
+
+if __name__ == '__main__':
+    main()
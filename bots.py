@@ -0,0 +1,233 @@
+import atexit
+import json
+import os
+import select
+import subprocess
+import sys
+import threading
+import time
+
+from players import BasePlayer
+
+
+class BotError(RuntimeError):
+    """ A bot process crashed, timed out or sent something that isn't a message. """
+
+
+class BotWorker:
+    """
+    One long-lived bot process, spoken to in line-delimited JSON over its stdin and stdout.
+
+    The process is started on the first call and kept for every call after. A bot that crashes,
+    misses a deadline or garbles its reply is killed, since a late answer would be taken for the
+    next one, and a new process is started on the next call.
+
+    Attributes:
+    - command (list): The command starting the bot.
+    - process (Popen): The running bot, None while there is none.
+    - starts (int): The number of times the bot was started.
+
+    Methods:
+    - ask(message, timeout): Sends a message and returns the reply, raises BotError if there is none in time.
+    - stop(): Kills the bot process.
+    """
+
+    def __init__(self, command):
+        self.command = list(command)
+        self.process = None
+        self.starts = 0
+        self._buffer = b''
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        self.stop()
+        self.process = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, bufsize=0)
+        self._buffer = b''
+        self.starts += 1
+
+    def stop(self):
+        if self.process is None:
+            return
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+        self.process.stdin.close()
+        self.process.stdout.close()
+        self.process = None
+
+    def _fail(self, reason):
+        self.stop()
+        raise BotError(f"{' '.join(self.command)}: {reason}")
+
+    def _readline(self, deadline):
+        stdout = self.process.stdout
+        while b'\n' not in self._buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([stdout], [], [], remaining)[0]:
+                self._fail("no reply in time")
+            chunk = os.read(stdout.fileno(), 65536)
+            if not chunk:
+                self._fail(f"exited with code {self.process.wait()}")
+            self._buffer += chunk
+        line, _, self._buffer = self._buffer.partition(b'\n')
+        return line
+
+    def ask(self, message, timeout):
+        if not self.alive:
+            self.start()
+        deadline = time.monotonic() + timeout
+        try:
+            self.process.stdin.write((json.dumps(message) + '\n').encode())
+        except OSError:
+            self._fail("stopped reading")
+
+        line = self._readline(deadline)
+        try:
+            reply = json.loads(line)
+        except ValueError:
+            reply = None
+        if not isinstance(reply, dict):
+            self._fail(f"sent {line[:80]!r}")
+        return reply
+
+
+class BotPool:
+    """
+    Keeps up to `size` workers of one bot command alive and lends them out a call at a time.
+
+    Workers are started as the calls need them and are kept across turns and games, so a
+    tournament pays for starting a bot once per worker instead of once per decision.
+
+    Attributes:
+    - command (list): The command starting the bot.
+    - size (int): The most bot processes running at once.
+    - timeout (float): The seconds a call waits for its reply by default.
+
+    Methods:
+    - ask(message, timeout=None): Asks an idle worker, waiting for one if all are busy.
+    - as_dict(): Returns the number of workers, calls and restarts.
+    - close(): Stops every worker.
+    """
+
+    def __init__(self, command, size=4, timeout=1.0):
+        self.command = list(command)
+        self.size = size
+        self.timeout = timeout
+        self.calls = 0
+        self._workers = []
+        self._idle = []
+        self._lock = threading.Lock()
+        self._available = threading.Semaphore(size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def ask(self, message, timeout=None):
+        with self._available:
+            with self._lock:
+                if self._idle:
+                    worker = self._idle.pop()
+                else:
+                    worker = BotWorker(self.command)
+                    self._workers.append(worker)
+                self.calls += 1
+            try:
+                return worker.ask(message, self.timeout if timeout is None else timeout)
+            finally:
+                with self._lock:
+                    self._idle.append(worker)
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'workers': len(self._workers),
+                'calls': self.calls,
+                'restarts': sum(max(worker.starts - 1, 0) for worker in self._workers),
+            }
+
+    def close(self):
+        with self._lock:
+            for worker in self._workers:
+                worker.stop()
+
+
+# the pools of this process by command, a process pool worker gets pools of its own
+_pools = {}
+
+
+def bot_pool(command):
+    """ the pool of this process for a bot command, started on first use """
+    key = tuple(command)
+    pool = _pools.get(key)
+    if pool is None:
+        pool = _pools[key] = BotPool(command)
+    return pool
+
+
+@atexit.register
+def close_pools():
+    for pool in _pools.values():
+        pool.close()
+    _pools.clear()
+
+
+class BotPlayer(BasePlayer):
+    """
+    A seat played by an external bot process.
+
+    Every turn the bot gets the same message as a network client (see BasePlayer.turn_message),
+    {"event": "your_turn", "player": name, "hand": [...], "total_dices": n, "bid": {"count": c, "face": f}
+    or null, "wild": bool}, and answers with {"bid": [count, face]} or {"liar": true}. If it fails to
+    answer in time or answers with an invalid move, the seat calls 'Liar!' or opens with one 1; a bot
+    that crashed or missed the deadline is restarted on its next call.
+
+    Attributes:
+    - command (list): The command starting the bot, its processes are pooled per command.
+    - timeout (float): The seconds the bot has per move.
+    - failures (int): The number of moves the bot failed to make.
+    """
+
+    def __init__(self, name, number_of_dices, command, timeout=1.0):
+        super().__init__(name, number_of_dices)
+        self.command = list(command)
+        self.timeout = timeout
+        self.failures = 0
+
+    def decide(self, bid):
+        try:
+            reply = bot_pool(self.command).ask(self.turn_message(bid), self.timeout)
+            if reply.get('liar') and bid.rank != bid.NO_BID:
+                return self.challenge()
+            count, face = (int(value) for value in reply['bid'])
+            result = self.place_bid(bid, count, face)
+            if result:
+                return result
+        except (BotError, KeyError, TypeError, ValueError):
+            pass
+
+        self.failures += 1
+        if bid.rank != bid.NO_BID:
+            return self.challenge()
+        return self.place_bid(bid, 1, 1)
+
+
+def run_bot(strategy):
+    """ answers the messages on stdin with strategy(message), one line each """
+    for line in sys.stdin:
+        print(json.dumps(strategy(json.loads(line))), flush=True)
+
+
+def main():
+    # an example bot, it plays the cautious strategy of the scripted network clients
+    from server import cautious_strategy
+    run_bot(cautious_strategy)
+
+
+if __name__ == '__main__':
+    main()
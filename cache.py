@@ -0,0 +1,69 @@
+from collections import OrderedDict
+
+
+class DecisionCache:
+    """
+    A size-bounded LRU cache of bid odds, shared by the computer players of a process.
+
+    An entry holds the probability of every bid of a round, by rank, and is keyed on what those
+    depend on: the own histogram, the dice in play and the wild flag. The current bid and the
+    gambler profile only pick from the odds, so every bid and profile in that situation shares it.
+
+    Attributes:
+    - maxsize (int): The most entries kept, the least recently used ones are dropped first.
+    - hits (int): The number of lookups answered from the cache.
+    - misses (int): The number of lookups that were not.
+
+    Methods:
+    - get(key): Returns the entry of a key, or None.
+    - put(key, entry): Stores the entry of a key.
+    - clear(): Drops every entry and resets the counters.
+    - as_dict(): Returns the size and counters as plain data.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        # not a lookup, the counters and the order are left alone
+        return key in self._entries
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def as_dict(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else None,
+        }
+
+
+# the cache every computer player of the process shares
+decision_cache = DecisionCache()
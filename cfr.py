@@ -0,0 +1,280 @@
+import argparse
+import os
+import random
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from items import FACES
+from streams import new_seed
+
+MAGIC = b'LDCF'
+HEADER = struct.Struct('<4sI')
+# info set key, first action, second action, weight of the first action out of 255
+RECORD = struct.Struct('<IBBB')
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cfr_strategy.bin')
+
+# the largest cup Game.set_dice_count allows
+MAX_DICES = 5
+
+# actions are stored as bytes: 0 calls 'Liar!', rank + 1 places the bid with that rank
+CHALLENGE = 0
+
+
+def hand_code(hand):
+    """ the sorted hand read as a base-7 number, unique for every hand """
+    code = 0
+    for face in sorted(hand):
+        code = code * 7 + face
+    return code
+
+
+def infoset_key(hand, opponent_dices, rank, is_wild, opened):
+    """
+    Packs what a player knows in a heads-up round into one integer.
+
+    Parameters:
+    - hand (list): The player's own dice.
+    - opponent_dices (int): The number of dice in the opponent's cup.
+    - rank (int): The rank of the current bid, -1 before the first bid.
+    - is_wild (bool): Flag indicating if 1's are wild.
+    - opened (bool): Flag indicating if the player placed the first bid of the round.
+    """
+    return (((hand_code(hand) * 8 + opponent_dices) * 64 + rank + 1) * 2 + int(is_wild)) * 2 + int(opened)
+
+
+@lru_cache(maxsize=None)
+def abstract_actions(rank, total_dices):
+    """
+    The actions the solver considers after a bid.
+
+    Every rank above the current one is legal, which is far too many to solve for, so a
+    player may only challenge, raise the count of the same face by one or two, or move to
+    a higher face at the same count or one more. The opening bid is one or two of any face.
+    """
+    if rank < 0:
+        return tuple((face - 1) * total_dices + count for face in FACES for count in (1, 2) if count <= total_dices)
+
+    actions = [CHALLENGE]
+    face, count = rank // total_dices + 1, rank % total_dices + 1
+    for higher_face in range(face, 7):
+        counts = (count + 1, count + 2) if higher_face == face else (count, count + 1)
+        for higher_count in counts:
+            if higher_count <= total_dices:
+                actions.append((higher_face - 1) * total_dices + higher_count)
+    return tuple(actions)
+
+
+def regret_matching(regrets):
+    positive = [max(regret, 0.0) for regret in regrets]
+    total = sum(positive)
+    if total > 0:
+        return [regret / total for regret in positive]
+    return [1 / len(regrets)] * len(regrets)
+
+
+class Trainer:
+    """
+    Outcome-sampling Monte Carlo CFR for one heads-up round of Liar's Dice.
+
+    A round is solved on its own: the player who loses the challenge loses a die, which is worth -1,
+    and the other player gets +1. Player 0 opens the round with `dices` dice against `opponent_dices`.
+    The info sets use imperfect recall, only the own hand and the last bid are remembered.
+
+    Attributes:
+    - dices (tuple): The number of dice of the opening player and of the other player.
+    - is_wild (bool): Flag indicating if 1's are wild.
+    - exploration (float): The share of uniform exploration in the traverser's sampling policy.
+    - regrets (dict): The cumulative regrets by info set key.
+    - strategy_sums (dict): The cumulative average strategy by info set key.
+
+    Methods:
+    - train(iterations): Runs the given number of sampled iterations for each player.
+    - average_strategy(): Returns the normalized average strategy of every info set.
+    """
+
+    def __init__(self, dices, opponent_dices, is_wild=False, seed=None, exploration=0.6):
+        self.dices = (dices, opponent_dices)
+        self.total_dices = dices + opponent_dices
+        self.is_wild = is_wild
+        self.exploration = exploration
+        self.rng = random.Random(seed)
+        self.regrets = {}
+        self.strategy_sums = {}
+        self._hands = None
+        self._matches = None
+
+    def train(self, iterations):
+        for _ in range(iterations):
+            self._hands = [sorted(self.rng.choices(FACES, k=number)) for number in self.dices]
+            self._matches = [0] * 7
+            for face in FACES:
+                for hand in self._hands:
+                    self._matches[face] += hand.count(face)
+                    if self.is_wild and face != 1:
+                        self._matches[face] += hand.count(1)
+            for update_player in (0, 1):
+                self._walk(-1, 0, update_player, 1.0, 1.0)
+
+    def _loser(self, rank, challenger):
+        face, count = rank // self.total_dices + 1, rank % self.total_dices + 1
+        if self._matches[face] >= count:
+            return challenger
+        return 1 - challenger
+
+    def _walk(self, rank, player, update_player, opponent_reach, sample_reach):
+        actions = abstract_actions(rank, self.total_dices)
+        key = infoset_key(self._hands[player], self.dices[1 - player], rank, self.is_wild, player == 0)
+        regrets = self.regrets.get(key)
+        if regrets is None:
+            regrets = self.regrets[key] = [0.0] * len(actions)
+        policy = regret_matching(regrets)
+
+        if player == update_player:
+            explore = self.exploration / len(actions)
+            sample_policy = [explore + (1 - self.exploration) * p for p in policy]
+        else:
+            sample_policy = policy
+        index = self.rng.choices(range(len(actions)), weights=sample_policy)[0]
+        action = actions[index]
+
+        if action == CHALLENGE:
+            child_value = 1.0 if self._loser(rank, player) != update_player else -1.0
+        elif player == update_player:
+            child_value = self._walk(action - 1, 1 - player, update_player,
+                                     opponent_reach, sample_reach * sample_policy[index])
+        else:
+            child_value = self._walk(action - 1, 1 - player, update_player,
+                                     opponent_reach * policy[index], sample_reach * sample_policy[index])
+
+        sampled_value = child_value / sample_policy[index]
+        value = policy[index] * sampled_value
+
+        if player == update_player:
+            weight = opponent_reach / sample_reach
+            for i in range(len(actions)):
+                regrets[i] += ((sampled_value if i == index else 0.0) - value) * weight
+        else:
+            sums = self.strategy_sums.get(key)
+            if sums is None:
+                sums = self.strategy_sums[key] = [0.0] * len(actions)
+            weight = opponent_reach / sample_reach
+            for i, p in enumerate(policy):
+                sums[i] += weight * p
+        return value
+
+    def average_strategy(self):
+        strategy = {}
+        for key, sums in self.strategy_sums.items():
+            total = sum(sums)
+            if total > 0:
+                strategy[key] = [value / total for value in sums]
+        return strategy
+
+    def actions_for(self, key):
+        """ the abstract actions of an info set key """
+        rank = (key // 4) % 64 - 1
+        return abstract_actions(rank, self.total_dices)
+
+
+def compact(trainer):
+    """ keeps the two most likely actions of every info set and the weight of the first """
+    entries = {}
+    for key, strategy in trainer.average_strategy().items():
+        actions = trainer.actions_for(key)
+        ranked = sorted(zip(strategy, actions), reverse=True)
+        first_weight, first = ranked[0]
+        second_weight, second = ranked[1] if len(ranked) > 1 else ranked[0]
+        weight = round(255 * first_weight / (first_weight + second_weight))
+        entries[key] = (first, second, weight)
+    return entries
+
+
+def train_round(dices, opponent_dices, is_wild, iterations, seed):
+    """ trains one heads-up round and returns its compact entries """
+    trainer = Trainer(dices, opponent_dices, is_wild, seed)
+    trainer.train(iterations)
+    return compact(trainer)
+
+
+class StrategyTable:
+    """
+    A compact heads-up strategy: the two most likely actions of every info set and the weight of the first.
+
+    Attributes:
+    - entries (dict): (first action, second action, weight out of 255) by info set key.
+
+    Methods:
+    - lookup(key): Returns the entry of an info set, or None if it was never trained.
+    - write(path): Writes the table to disk.
+    - read(path): Reads a table from disk.
+    """
+
+    def __init__(self, entries):
+        self.entries = entries
+
+    def lookup(self, key):
+        return self.entries.get(key)
+
+    def write(self, path=DEFAULT_PATH):
+        with open(path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, len(self.entries)))
+            for key in sorted(self.entries):
+                file.write(RECORD.pack(key, *self.entries[key]))
+        return path
+
+    @classmethod
+    def read(cls, path=DEFAULT_PATH):
+        with open(path, 'rb') as file:
+            data = file.read()
+        magic, count = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a CFR strategy table")
+        records = struct.iter_unpack(RECORD.format, data[HEADER.size:HEADER.size + count * RECORD.size])
+        return cls({key: (first, second, weight) for key, first, second, weight in records})
+
+
+def load(path=DEFAULT_PATH):
+    """ reads the strategy table at path, if the file exists """
+    if not os.path.exists(path):
+        return None
+    return StrategyTable.read(path)
+
+
+def train(max_dices=MAX_DICES, iterations=200000, workers=None, seed=None, path=DEFAULT_PATH):
+    """
+    Trains every heads-up round up to max_dices per player, regular and wild, across a process pool.
+
+    A game started with n dice each passes through every pair of cup sizes up to n, so all of
+    them are trained. The rounds share no info sets and are trained independently.
+    """
+    rng = random.Random(new_seed() if seed is None else seed)
+    jobs = [(dices, opponent_dices, is_wild, iterations, rng.getrandbits(64))
+            for is_wild in (False, True)
+            for dices in range(1, max_dices + 1)
+            for opponent_dices in range(1, max_dices + 1)]
+
+    entries = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for result in pool.map(train_round, *zip(*jobs)):
+            entries.update(result)
+    return StrategyTable(entries).write(path), len(entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the heads-up CFR strategy for the computer players.")
+    parser.add_argument('--dice', type=int, default=MAX_DICES, choices=range(1, MAX_DICES + 1))
+    parser.add_argument('--iterations', type=int, default=200000)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--output', default=DEFAULT_PATH)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    path, count = train(args.dice, args.iterations, args.workers, args.seed, args.output)
+    print(f"{count} info sets written to {path} in {time.perf_counter() - start:.0f}s")
+
+
+if __name__ == '__main__':
+    main()
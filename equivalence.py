@@ -0,0 +1,342 @@
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import tables
+from batch import run_games
+from game import Game
+from items import Bid, Cup, Table
+from players import AnytimeComputerPlayer, ComputerPlayer
+from probability import log_binomial
+from renderers import NullRenderer
+from sampling import wilson_interval
+from streams import new_seed
+
+# the rolls per bid of the simulation reference
+SIMULATIONS = 1000
+# the rolls per decision of the fixed sampler, shared by every bid
+SAMPLER_ROLLS = 1000
+# exact engines may differ by rounding only
+TOLERANCE = 1e-9
+
+
+def uncached_player(profile, dices):
+    player = ComputerPlayer(profile, dices)
+    player.cache = None
+    return player
+
+
+def frontier_player(profile, dices):
+    player = ComputerPlayer(profile, dices)
+    player.frontier = Game.large_table_frontier
+    return player
+
+
+def sampler_player(profile, dices):
+    """ the anytime sampler held to a fixed number of rolls per decision, shared by every bid """
+    return AnytimeComputerPlayer(profile, dices, budget=math.inf, batch=SAMPLER_ROLLS, max_samples=SAMPLER_ROLLS)
+
+
+class SimulationComputerPlayer(ComputerPlayer):
+    """
+    The reference engine: every bid is estimated on its own by simulate_bid_proba, from fresh
+    rolls of the hidden dice, the way the exact odds were first checked.
+
+    It is slow, a decision costs a simulation per raise, so it suits the situations more than
+    the paired games.
+
+    Attributes:
+    - samples (int): The rolls behind every estimate.
+    """
+    cache = None
+    samples = SIMULATIONS
+
+    def calculate_bid_proba(self, quantity, face):
+        return self.simulate_bid_proba(quantity, face, self.samples)
+
+    def generate_probabilities(self, combinations):
+        return [(self.calculate_bid_proba(quantity, face), (quantity, face)) for quantity, face in combinations]
+
+
+# the engines by name, each makes a computer player from a gambler profile and a number of dice
+ENGINES = {
+    'simulation': SimulationComputerPlayer,
+    'exact': ComputerPlayer,
+    'exact-uncached': uncached_player,
+    'frontier': frontier_player,
+    'sampler': sampler_player,
+    'anytime': AnytimeComputerPlayer,
+}
+
+Situation = namedtuple('Situation', 'seed profile dices total_dices is_wild rank')
+Situation.__doc__ = """ A decision facing a computer player after a bid, all drawn from the seed. """
+
+
+def situation(seed):
+    """ a table of 2 - 6 players with up to 5 dice each and a current bid near the expected count of its face """
+    rng = random.Random(seed)
+    players = rng.randint(2, 6)
+    most_dices = rng.randint(2, 5)
+    dices = rng.randint(1, most_dices)
+    total_dices = dices + sum(rng.randint(1, most_dices) for _ in range(players - 1))
+    is_wild = rng.random() < 0.5
+    face = rng.randint(1, 6)
+    expected = total_dices / (3 if is_wild and face != 1 else 6)
+    count = min(max(round(expected + rng.gauss(0, 1.5)), 1), total_dices)
+    profile = rng.choice(list(ComputerPlayer.gambler))
+    return Situation(seed, profile, dices, total_dices, is_wild, (face - 1) * total_dices + count - 1)
+
+
+def seat(engine, situation):
+    """ the engine's player in the situation, with the hand and random stream of the seed """
+    player = ENGINES[engine](situation.profile, situation.dices)
+    player.cup = Cup(situation.dices, Table(rng=random.Random(situation.seed))).roll()
+    player.total_dices = situation.total_dices
+    player.is_wild = situation.is_wild
+    player.rng = random.Random(situation.seed)
+    bid = Bid(situation.total_dices)
+    bid.rank = situation.rank
+    return player, bid
+
+
+def estimate(player, bid):
+    """
+    The engine's probability of the current bid and of every raise, in rank order.
+
+    Returns:
+    - tuple: The probabilities and the number of rolls behind them, None for an exact engine.
+    """
+    if isinstance(player, AnytimeComputerPlayer):
+        player.new_decision()
+    combinations = [bid.decode(rank) for rank in range(bid.rank, 6 * bid.total_dices)]
+    probabilities = [proba for proba, _ in player.generate_probabilities(combinations)]
+    return probabilities, getattr(player, 'samples', None)
+
+
+def chance_rate(z):
+    """ the two-sided share of a normal distribution beyond z standard deviations """
+    return math.erfc(z / math.sqrt(2))
+
+
+def surprising(successes, trials, proba, alpha):
+    """ whether so many successes in so many trials are further from the exact proba than chance allows at alpha """
+    if proba <= 0.0 or proba >= 1.0:
+        return successes != round(trials * proba)
+
+    # sum the binomial tail from the successes away from the mean, until it is clearly large enough
+    step = 1 if successes > trials * proba else -1
+    log_p, log_q = math.log(proba), math.log1p(-proba)
+    tail = 0.0
+    count = successes
+    while 0 <= count <= trials and tail < alpha / 2:
+        term = math.exp(log_binomial(trials, count) + count * log_p + (trials - count) * log_q)
+        if term < tail * 1e-12:
+            break
+        tail += term
+        count += step
+    return tail < alpha / 2
+
+
+def disagree(a, a_samples, b, b_samples, z):
+    """
+    Whether two estimates of a bid differ by more than chance: exact values by rounding only, an estimate
+    from an exact value by the binomial test at z, and two estimates by their Wilson intervals at z.
+    """
+    if a_samples is None and b_samples is None:
+        return abs(a - b) > TOLERANCE
+    if a_samples is None or b_samples is None:
+        exact, (estimate, samples) = (a, (b, b_samples)) if a_samples is None else (b, (a, a_samples))
+        return surprising(round(estimate * samples), samples, exact, chance_rate(z))
+    low_a, high_a = wilson_interval(round(a * a_samples), a_samples, z)
+    low_b, high_b = wilson_interval(round(b * b_samples), b_samples, z)
+    return high_a < low_b or high_b < low_a
+
+
+def compare_situations(reference, candidate, seeds, z):
+    """ compares the probabilities and the decisions of two engines over the situations of the seeds """
+    result = Counter()
+    for seed in seeds:
+        case = situation(seed)
+        estimates = [estimate(*seat(engine, case)) for engine in (reference, candidate)]
+        (expected, expected_samples), (actual, actual_samples) = estimates
+        for a, b in zip(expected, actual):
+            result['bids'] += 1
+            result['outside'] += disagree(a, expected_samples, b, actual_samples, z)
+        result['sampled'] += (expected_samples is not None) + (actual_samples is not None)
+
+        choices = [player.choose(bid) for player, bid in (seat(engine, case) for engine in (reference, candidate))]
+        result['decisions'] += 1
+        result['same_choice'] += choices[0] == choices[1]
+        result['same_action'] += (choices[0] == 'Liar!') == (choices[1] == 'Liar!')
+    return result
+
+
+def paired_games(reference, candidate, seeds):
+    """
+    Plays every seeded game twice, with the reference and then the candidate in the tested seat.
+
+    The other seats are standard computer players and both games share the seed, so they only
+    differ by the engine. Returns the (reference won, candidate won) pair of every seed.
+    """
+    games = []
+    tested = []
+    for seed in seeds:
+        rng = random.Random(seed)
+        players = rng.randint(2, 4)
+        dices = rng.randint(2, 5)
+        is_wild = rng.random() < 0.5
+        profiles = rng.sample(list(ComputerPlayer.gambler), players)
+        index = rng.randrange(players)
+        for engine in (reference, candidate):
+            line_up = [ComputerPlayer(profile, dices) for profile in profiles]
+            line_up[index] = ENGINES[engine](profiles[index], dices)
+            game = Game(renderer=NullRenderer(), seed=seed)
+            game.seat_players(line_up, is_wild)
+            games.append(game)
+            tested.append(line_up[index])
+
+    wins = [int(winner is player) for winner, player in zip(run_games(games), tested)]
+    return list(zip(wins[0::2], wins[1::2]))
+
+
+def chunks(seeds, workers):
+    size = max(1, math.ceil(len(seeds) / (workers * 4)))
+    return [seeds[i:i + size] for i in range(0, len(seeds), size)]
+
+
+def run(reference, candidate, situations=2000, games=0, workers=None, seed=None, z=3.29):
+    """
+    Replays a seeded corpus of decisions and games through two engines and compares them.
+
+    - Probabilities: every bid of a situation, the current one and all raises, is estimated
+      by both engines and the estimates are compared within the bounds at z (see disagree).
+    - Decisions: both engines choose in every situation with the same random stream.
+    - Games: paired games differing only by the engine of one seat, the win rate difference
+      comes with its confidence interval at z. No games are played by default.
+
+    Returns:
+    - dict: The counts and rates of each comparison.
+    """
+    workers = workers or os.cpu_count()
+    seed = new_seed() if seed is None else seed
+    rng = random.Random(seed)
+    situation_seeds = [rng.getrandbits(64) for _ in range(situations)]
+    game_seeds = [rng.getrandbits(64) for _ in range(games)]
+    start = time.perf_counter()
+
+    totals = Counter()
+    pairs = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=tables.load) as pool:
+        situation_futures = [pool.submit(compare_situations, reference, candidate, part, z)
+                             for part in chunks(situation_seeds, workers)]
+        game_futures = [pool.submit(paired_games, reference, candidate, part) for part in chunks(game_seeds, workers)]
+        for future in situation_futures:
+            totals.update(future.result())
+        for future in game_futures:
+            pairs.extend(future.result())
+
+    # the share of bids expected outside the bounds by chance, when any engine samples
+    expected_outside = chance_rate(z) if totals['sampled'] else 0.0
+    differences = [b - a for a, b in pairs]
+    n = len(differences)
+    mean = sum(differences) / n if n else 0.0
+    variance = sum((d - mean) ** 2 for d in differences) / (n - 1) if n > 1 else 0.0
+    margin = z * math.sqrt(variance / n) if n else 0.0
+    decisions = totals['decisions'] or 1
+    return {
+        'seed': seed,
+        'reference': reference,
+        'candidate': candidate,
+        'seconds': time.perf_counter() - start,
+        'bids': totals['bids'],
+        'outside': totals['outside'],
+        'outside_rate': totals['outside'] / totals['bids'] if totals['bids'] else 0.0,
+        'expected_outside_rate': expected_outside,
+        'decisions': totals['decisions'],
+        'choice_agreement': totals['same_choice'] / decisions,
+        'action_agreement': totals['same_action'] / decisions,
+        'games': n,
+        'reference_win_rate': sum(a for a, _ in pairs) / n if n else 0.0,
+        'candidate_win_rate': sum(b for _, b in pairs) / n if n else 0.0,
+        'win_rate_difference': (mean - margin, mean + margin),
+    }
+
+
+def games_verdict(report, max_difference=0.03):
+    """
+    Whether the paired games show the engines equivalent, in the manner of two one-sided tests:
+
+    - 'equivalent': the confidence interval of the win rate difference lies within ±max_difference,
+    - 'different': it lies beyond that margin on one side and leaves out 0, so the engines play apart,
+    - 'inconclusive': too few games to tell either way,
+    - None: no games were played.
+    """
+    if not report['games']:
+        return None
+    low, high = report['win_rate_difference']
+    if -max_difference < low and high < max_difference:
+        return 'equivalent'
+    if low > 0 or high < 0:
+        return 'different'
+    return 'inconclusive'
+
+
+def verdict(report, min_agreement=0.95, max_difference=0.03):
+    """ the failed checks of a report, empty when the candidate passes for the reference """
+    failures = []
+    # bids fall outside the bounds by chance at most twice as often as expected, never between exact engines
+    if report['outside_rate'] > 2 * report['expected_outside_rate']:
+        failures.append('probabilities')
+    if report['action_agreement'] < min_agreement:
+        failures.append('decisions')
+    if games_verdict(report, max_difference) == 'different':
+        failures.append('games')
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that a candidate AI engine decides like the reference.")
+    parser.add_argument('--reference', choices=ENGINES, default='simulation')
+    parser.add_argument('--candidate', choices=ENGINES, default='exact')
+    parser.add_argument('--situations', type=int, default=2000)
+    parser.add_argument('--games', type=int, default=0,
+                        help="paired games, each played once per engine, none by default")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--z', type=float, default=3.29, help="the z-score of the confidence bounds")
+    parser.add_argument('--min-agreement', type=float, default=0.95,
+                        help="the least share of situations where both engines bid or both call 'Liar!'")
+    parser.add_argument('--max-difference', type=float, default=0.03,
+                        help="the win rate difference within which the engines play alike")
+    args = parser.parse_args()
+
+    report = run(args.reference, args.candidate, args.situations, args.games, args.workers, args.seed, args.z)
+    low, high = report['win_rate_difference']
+    print(f"Seed {report['seed']}: {report['candidate']} against {report['reference']} in {report['seconds']:.1f}s")
+    print(f"  probabilities  {report['outside']} of {report['bids']} bids outside the bounds "
+          f"({report['outside_rate']:.3%}, {report['expected_outside_rate']:.3%} expected by chance)")
+    print(f"  decisions      {report['action_agreement']:.2%} same action, "
+          f"{report['choice_agreement']:.2%} same choice in {report['decisions']} situations")
+    games = games_verdict(report, args.max_difference)
+    if games is None:
+        print("  games          not played, see --games")
+    else:
+        print(f"  games          {report['candidate_win_rate']:.2%} against {report['reference_win_rate']:.2%} "
+              f"in {report['games']} paired games, difference between {low:+.2%} and {high:+.2%}: {games}")
+
+    failures = verdict(report, args.min_agreement, args.max_difference)
+    if failures:
+        sys.exit(f"Arrr, the candidate differs from the reference in: {', '.join(failures)}")
+    if games == 'inconclusive':
+        sys.exit(f"Arrr, {report['games']} games can't bound the win rate difference within "
+                 f"±{args.max_difference:.0%}, play more of them.")
+    print("The candidate decides like the reference.")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,13 @@
-import random
 import time
-from collections import deque
+from collections import Counter, deque
 
-from items import Bid
-from players import ComputerPlayer, HumanPlayer, BasePlayer
+import cfr
+import tables
+from items import Bid, Table
+from players import ComputerPlayer, HumanPlayer, CFRComputerPlayer
+from renderers import ConsoleRenderer
+from speculation import Speculator
+from streams import Streams
 
 
 class Game:
@@ -15,8 +19,16 @@ class Game:
     - available_computer_players_names (list): Predefined list of pirate-themed computer player names.
     - initial_players_count (int): The number of players in the game.
     - dices (int): The number of dice each player has.
+    - large_table_frontier (int): The raises per face weighed by the computer players of a large table.
     - players (deque): A deque containing all the players (human and computer).
+    - table (Table): Holds the dice of every player's cup.
     - is_wild (bool): Flag indicating if the game is in wild mode.
+    - streams (Streams): The random generators of the game, all derived from its seed.
+    - seed (int): The seed the game replays from.
+    - stats (GameStats): Records decision latencies, rounds and end of turn times, None to record nothing.
+    - log (GameLog): Records the game and every round it resolves, None to record nothing.
+    - speculator (Speculator): Works out the computer players' odds while a human thinks, None not to.
+    - renderer (BaseRenderer): Receives the game events, the pirate console by default.
 
     Methods:
     --------
@@ -33,11 +45,22 @@ class Game:
     generate_players():
         Adds players (human and computer) to the game based on the player count.
 
-    generate_computer_players():
-        Generates the required number of computer players with random pirate names.
+    generate_computer_players(count=None):
+        Generates the required number of computer players, or `count` of them, with random pirate names.
 
         Returns:
-        - list: A list of ComputerPlayer objects.
+        - list: A list of ComputerPlayer objects, CFRComputerPlayer objects once a CFR strategy is loaded.
+        Beyond the five pirates, numbered crews of them are signed on.
+
+    seat_large_table(players, dices, is_wild=False, human_name=None):
+        Seats a party table of any size, with one human player when a name is given. All its
+        computer players weigh a frontier of raises, however few seats the table has.
+
+    seat(players):
+        Moves the players' dice to the table, gives each player a random stream and rolls.
+
+    seat_players(players, is_wild):
+        Seats the given players without asking anything, used for headless games.
 
     end_turn(bid, current_player, challenged_player):
         Resolves the end of a turn, revealing dice, checking bids, and updating game state.
@@ -47,11 +70,19 @@ class Game:
         - current_player (BasePlayer): The player who placed the last bid.
         - challenged_player (BasePlayer): The player who challenged the bid.
 
+    next_player(bid):
+        Returns the player to take the next turn, or None once one player remains.
+
+    resolve_turn(bid, current_player, challenged):
+        Ends the round if the player challenged, otherwise passes the turn on.
+
+    run():
+        Plays rounds until one player remains and returns the winner.
+
     play():
-        Starts the game loop where players take turns, challenge bids, and win or lose until one winner remains.
+        Asks for the settings, plays one interactive match and returns the winner.
     """
 
-    turn = 0
     available_computer_players_names = [
         "Cap'n Scattershot",
         "One-Eyed Fortune",
@@ -59,12 +90,21 @@ class Game:
         "Ironhook Steady",
         "Barnacle Bill the Unshaken",
     ]
+    # the counts per face the computer players of a large table weigh, see ComputerPlayer.frontier
+    large_table_frontier = 9
 
-    def __init__(self):
+    def __init__(self, renderer=None, seed=None, stats=None, log=None, speculate=True):
+        self.turn = 0
         self.initial_players_count = None
         self.dices = None
         self.players = None
+        self.streams = Streams(seed)
+        self.table = Table(rng=self.streams.stream('table'))
         self.is_wild = False
+        self.renderer = renderer or ConsoleRenderer()
+        self.stats = stats
+        self.log = log
+        self.speculator = Speculator() if speculate else None
 
     def set_dice_count(self):
         while True:
@@ -97,7 +137,6 @@ class Game:
                 break
             elif user_input.lower().strip() == 'w':
                 self.is_wild = True
-                BasePlayer.is_wild = True
                 break
             else:
                 print("Arrr, make a proper choice, ye scallywag, or ye'll be feedin' the sharks!")
@@ -119,90 +158,210 @@ class Game:
 
         players = players + self.generate_computer_player()
 
+        self.seat(players)
+
+    def generate_computer_player(self, count=None):
+        comp_players_needed = self.initial_players_count - 1 if count is None else count
+        seating = self.streams.stream('seating')
+        player_class = CFRComputerPlayer if CFRComputerPlayer.strategy is not None else ComputerPlayer
+        if comp_players_needed <= len(self.available_computer_players_names):
+            players = seating.sample(self.available_computer_players_names, comp_players_needed)
+            return [player_class(name=comp, number_of_dices=self.dices) for comp in players]
+
+        # a large table signs on whole crews, every pirate plays like its namesake
+        players = []
+        for number in range(1, comp_players_needed + 1):
+            comp = seating.choice(self.available_computer_players_names)
+            players.append(ComputerPlayer(name=f"{comp} #{number}", number_of_dices=self.dices,
+                                          gambler_threshold=ComputerPlayer.gambler[comp]))
+        return players
+
+    def seat_large_table(self, players, dices, is_wild=False, human_name=None):
+        """ seats a party table of any size, its computer players only weigh a frontier of raises """
+        self.dices = dices
+        line_up = [] if human_name is None else [HumanPlayer(name=human_name, number_of_dices=dices)]
+        line_up += self.generate_computer_player(players - len(line_up))
+        # the many dice make a table large, not the number of seats
+        for player in line_up:
+            if isinstance(player, ComputerPlayer):
+                player.frontier = self.large_table_frontier
+        self.seat_players(line_up, is_wild)
+
+    @property
+    def seed(self):
+        return self.streams.seed
+
+    def seat(self, players):
+        """ moves the players' dice to the table and gives each player its own random stream """
+        for index, player in enumerate(players):
+            player.renderer = self.renderer
+            player.is_wild = self.is_wild
+            player.rng = self.streams.stream(f'player/{index}')
+            player.stats = self.stats
+            self.table.adopt(player.cup)
+        self.table.roll()
         self.players = deque(players)
+        if self.log is not None:
+            self.log.game(self)
 
-    def generate_computer_player(self):
-        comp_players_needed = self.initial_players_count - 1
-        players = set()
-        while len(players) < comp_players_needed:
-            players.add(random.choice(self.available_computer_players_names))
-        return [ComputerPlayer(name=comp, number_of_dices=self.dices) for comp in players]
+    def seat_players(self, players, is_wild=False):
+        self.is_wild = is_wild
+        self.seat(players)
+        self.initial_players_count = len(players)
+        self.dices = max(player.cup.number_of_dices for player in players)
 
     def end_turn(self, bid, current_player, challenged_player):
         # reveal all dices
-        all_dice = []
-        for player in self.players:
-            print(f"Arrr, {player.name} be holdin' {player.cup.hand} in their hand!")
-            all_dice += player.cup.hand
-        print()
-        time.sleep(1)
+        self.renderer.reveal(self.players)
 
-        quantity = bid.current_bid['count']
-        face = bid.current_bid['face']
+        quantity, face = bid.count, bid.face
 
-        counter = bid.dice_counter(all_dice)
+        counter = self.table.totals()
         # account for the wild version to produce correct count of the dices
         if self.is_wild and face != 1:
             counter[face] += counter[1]
 
-        if counter[face] >= quantity:
+        held = counter[face] >= quantity
+        if self.log is not None:
+            # before the loser gives up a die
+            self.log.round(self, bid, current_player, challenged_player, held)
+
+        if held:
             challenged_player.win()
             current_player.loose(bid)
         else:
             challenged_player.loose(bid)
             current_player.win()
             self.players.rotate()
-        print()
-        time.sleep(1)
-        # print how many dices players have
-        for player in self.players:
-            print(f"Avast! {player.name} be havin' {player.cup.number_of_dices} dice(s) in their cup!")
-        print()
+        self.renderer.round_ended(self.players)
 
         # reset the bid
-        bid.current_bid = None
-        bid.last_bid = None
+        bid.reset()
 
         # roll all dice
-        for player in self.players:
-            player.cup.roll()
+        self.table.roll()
 
         # increase the count of the turns
         self.turn += 1
-        time.sleep(2)
+
+    def new_bid(self):
+        return Bid(sum(player.cup.number_of_dices for player in self.players))
+
+    def next_player(self, bid):
+        """ drops an eliminated player and returns the one to play, or None once there is a winner """
+        current_player = self.players[0]
+
+        # check if is playing and if not -> pop out
+        if not current_player.is_playing:
+            self.players.popleft()
+            current_player = self.players[0]
+
+        # check for winner
+        if len(self.players) == 1:
+            if self.stats is not None:
+                self.stats.rounds.observe(self.turn)
+            return None
+
+        # set total dices for the current player
+        current_player.total_dices = bid.total_dices
+        return current_player
+
+    def resolve_turn(self, bid, current_player, challenged):
+        """ ends the round after a challenge, otherwise passes the turn on """
+        if not challenged:
+            self.players.rotate(-1)
+            return
+
+        challenged_player = self.players[-1]
+        if self.stats is None:
+            self.end_turn(bid, current_player, challenged_player)
+        else:
+            start = time.perf_counter()
+            self.end_turn(bid, current_player, challenged_player)
+            self.stats.end_turn_latency.observe(time.perf_counter() - start)
+
+    def run(self):
+        bid = self.new_bid()
+        while True:
+            current_player = self.next_player(bid)
+            if current_player is None:
+                return self.players[0]
+            if self.speculator is not None and isinstance(current_player, HumanPlayer):
+                # the computer players think ahead while the human does
+                self.speculator.start(self.players, bid)
+                try:
+                    challenged = current_player.take_turn(bid)
+                finally:
+                    self.speculator.stop()
+            else:
+                challenged = current_player.take_turn(bid)
+            self.resolve_turn(bid, current_player, challenged)
 
     def play(self):
-        print("Welcome aboard to Liar's Dice! Let’s be havin’ ourselves a game, ye scurvy lot!")
         if self.initialize():
-            bid = Bid(self.dices * self.initial_players_count)
-            while True:
-                current_player = self.players[0]
-                # set total dices for each player
-                current_player.total_dices = bid.total_dices
-
-                # check if is playing and if not -> pop out
-                if not current_player.is_playing:
-                    self.players.popleft()
-                    current_player = self.players[0]
-
-                # check for winner
-                if len(self.players) == 1:
-                    print(
-                        f"Hoist the colors! The winner be ---{current_player.name}---, the mightiest pirate o' them all!")
-                    user_input = input("Fancy another round, matey? (y/n): ")
-                    if user_input.lower() == 'y':
-                        self.play()
-                    else:
-                        raise SystemExit
-
-                result = current_player.take_turn(bid)
-                if result:
-                    challenged_player = self.players[-1]
-                    self.end_turn(bid, current_player, challenged_player)
-                    continue
-                self.players.rotate(-1)
+            winner = self.run()
+            self.renderer.winner(winner)
+            return winner
+
+
+class Session:
+    """
+    Plays consecutive matches in a flat loop, every one of them on a fresh Game.
+
+    Nothing but the session's tally carries over from one match to the next: each match gets
+    new players, a new table and a new bid, with random streams seeded from the session seed,
+    so a seeded session replays match for match however long it runs.
+
+    Attributes:
+    - renderer (BaseRenderer): The renderer every match is shown with.
+    - streams (Streams): The session's random generators, the match seeds are drawn from them.
+    - stats (Stats): Optional, passed on to every match.
+    - log (GameLog): Optional, every match is appended to it.
+    - matches (int): The number of matches played.
+    - wins (Counter): The matches won by player name.
+
+    Methods:
+    - new_game(): Returns a fresh Game seeded with the next match seed.
+    - play_match(setup): Seats a fresh Game with setup(game), plays it out and returns the winner.
+    - play(): Plays interactive matches for as long as the player fancies another round.
+    """
+
+    def __init__(self, renderer=None, seed=None, stats=None, log=None):
+        self.renderer = renderer or ConsoleRenderer()
+        self.streams = Streams(seed)
+        self.stats = stats
+        self.log = log
+        self.matches = 0
+        self.wins = Counter()
+
+    @property
+    def seed(self):
+        return self.streams.seed
+
+    def new_game(self):
+        seed = self.streams.stream('matches').getrandbits(64)
+        return Game(renderer=self.renderer, seed=seed, stats=self.stats, log=self.log)
+
+    def play_match(self, setup):
+        """ setup(game) seats new players, e.g. Game.initialize or a seat_players call """
+        game = self.new_game()
+        setup(game)
+        winner = game.run()
+        self.renderer.winner(winner)
+        self.matches += 1
+        self.wins[winner.name] += 1
+        return winner
+
+    def play(self):
+        print("Welcome aboard to Liar's Dice! Let’s be havin’ ourselves a game, ye scurvy lot!")
+        while True:
+            self.play_match(Game.initialize)
+            user_input = input("Fancy another round, matey? (y/n): ")
+            if user_input.lower() != 'y':
+                return self.wins
 
 
 if __name__ == '__main__':
-    game = Game()
-    game.play()
+    tables.load()
+    CFRComputerPlayer.strategy = cfr.load()
+    Session().play()
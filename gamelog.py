@@ -0,0 +1,378 @@
+import argparse
+import io
+import math
+import mmap
+import os
+import struct
+import weakref
+from collections import namedtuple
+
+import cfr
+import tables
+from game import Game
+from players import BasePlayer, BayesianComputerPlayer, CFRComputerPlayer, ComputerPlayer
+from renderers import NullRenderer
+
+MAGIC = b'LDGL'
+HEADER = struct.Struct('<4sH')
+VERSION = 4
+
+# every record is framed by its kind and the length of its payload
+FRAME = struct.Struct('<BI')
+GAME, ROUND = 1, 2
+
+# seed, number of seats, flags
+GAME_HEAD = struct.Struct('<QHB')
+# the flags of a game: 1's are wild, the CFR players played from a loaded strategy
+WILD, CFR_STRATEGY = 1, 2
+# after the class and name of a seat: number of dice, gamble threshold (NaN if none), opening count and face,
+# frontier (0 to weigh every raise)
+SEAT = struct.Struct('<HdHBH')
+# seed, bytes back to the game's record, round, number of seats, seat of the bidder, seat of the challenger,
+# seat of the loser, bid held, number of bids
+ROUND_HEAD = struct.Struct('<QQIHHHHBI')
+# rank, seat
+BID = struct.Struct('<IH')
+
+# the dice of a seat and the bytes of a name are logged in one byte each
+MAX_SEAT_DICES = 255
+MAX_NAME_BYTES = 255
+
+MAX_SEED = 2 ** 64 - 1
+
+# the players whose decisions replay from the game seed, the other seats replay their logged moves
+ENGINE_PLAYERS = {cls.__name__: cls for cls in (ComputerPlayer, BayesianComputerPlayer, CFRComputerPlayer)}
+
+GameRecord = namedtuple('GameRecord', 'offset seed is_wild cfr_strategy seats')
+GameRecord.__doc__ = """
+A game as it was seated: offset is where its record starts in the log, seats is a list of
+SeatRecords and cfr_strategy whether one was loaded.
+"""
+
+SeatRecord = namedtuple('SeatRecord', 'player name dices threshold opening_count opening_face frontier')
+SeatRecord.__doc__ = """
+A seat as it was played: the player class name, the player name, the number of dice and, for
+computer players, the gamble threshold, the highest opening count and face and the frontier of
+a large table (NaN and 0 otherwise, a frontier of 0 weighs every raise).
+"""
+
+RoundRecord = namedtuple('RoundRecord', 'seed round hands bids bidder challenger loser held')
+RoundRecord.__doc__ = """
+A round ended by a challenge. Players are seat numbers, hands is the revealed dice of every seat
+(empty once out) and bids is the (rank, seat) sequence of the round, see Bid.encode.
+"""
+
+
+def pack_faces(faces):
+    """ two dice per byte """
+    if len(faces) % 2:
+        faces = list(faces) + [0]
+    return bytes(faces[i] << 4 | faces[i + 1] for i in range(0, len(faces), 2))
+
+
+def unpack_faces(data, count):
+    faces = []
+    for byte in data:
+        faces.append(byte >> 4)
+        faces.append(byte & 0x0F)
+    return faces[:count]
+
+
+class GameLog:
+    """
+    An append-only binary log of games and of every round they resolve.
+
+    A game writes one game record when it is seated and one round record per challenge, about
+    forty bytes plus half a byte per die and six bytes per bid. The game record holds what
+    the computer seats decide by besides the seed: their thresholds, openings and frontiers, and
+    whether the CFR players had a strategy. Any number of seats can be logged, with up to 255
+    dice and a name of up to 255 bytes each.
+
+    A log may hold the same seed more than once, e.g. a tournament run twice into one file, so
+    every round record points back to the record of its own game rather than naming it by seed.
+    The distance back stays the same when the records are copied to another log by extend().
+
+    Attributes:
+    - file: The binary file the records are appended to.
+
+    Methods:
+    - game(game): Appends the record of a seated game.
+    - round(game, bid, challenger, bidder, held): Appends the record of a challenged round.
+    - extend(data): Appends the records of another log's bytes.
+    - getvalue(): Returns the bytes of an in-memory log.
+    - close(): Flushes and closes the file.
+    """
+
+    def __init__(self, target=None):
+        # a path, a binary file or None for an in-memory log
+        if target is None:
+            self.file = io.BytesIO()
+        elif isinstance(target, (str, os.PathLike)):
+            # appending to a log of another version would leave a file no reader accepts
+            if os.path.exists(target) and os.path.getsize(target):
+                with open(target, 'rb') as file:
+                    if file.read(HEADER.size) != HEADER.pack(MAGIC, VERSION):
+                        raise ValueError(f"{target} is not a game log of this version, log to another file")
+            self.file = open(target, 'ab')
+        else:
+            self.file = target
+        if self.file.tell() == 0:
+            self.file.write(HEADER.pack(MAGIC, VERSION))
+        # where the record of every game logged here starts
+        self._games = weakref.WeakKeyDictionary()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _append(self, kind, payload):
+        self.file.write(FRAME.pack(kind, len(payload)) + payload)
+
+    def game(self, game):
+        if not isinstance(game.seed, int) or not 0 <= game.seed <= MAX_SEED:
+            raise ValueError("Only games with a 64-bit integer seed can be logged")
+
+        seats = sorted(game.players, key=lambda player: player.cup.seat)
+        for player in seats:
+            if player.cup.number_of_dices > MAX_SEAT_DICES or len(player.name.encode()) > MAX_NAME_BYTES:
+                raise ValueError(f"Only seats of up to {MAX_SEAT_DICES} dice and names of up to "
+                                 f"{MAX_NAME_BYTES} bytes can be logged")
+        flags = WILD * game.is_wild
+        if any(isinstance(player, CFRComputerPlayer) and player.strategy is not None for player in seats):
+            flags |= CFR_STRATEGY
+        self._games[game] = self.file.tell()
+        payload = bytearray(GAME_HEAD.pack(game.seed, len(seats), flags))
+        for player in seats:
+            for text in (type(player).__name__, player.name):
+                encoded = text.encode()
+                payload += bytes([len(encoded)]) + encoded
+            payload += SEAT.pack(player.cup.number_of_dices, getattr(player, 'gambler_threshold', math.nan),
+                                 getattr(player, 'opening_count', 0), getattr(player, 'opening_face', 0),
+                                 getattr(player, 'frontier', None) or 0)
+        self._append(GAME, payload)
+
+    def round(self, game, bid, challenger, bidder, held):
+        table = game.table
+        seats = len(table.counts)
+        loser = challenger if held else bidder
+        back = self.file.tell() - self._games[game]
+        payload = bytearray(ROUND_HEAD.pack(game.seed, back, game.turn, seats, bidder.cup.seat, challenger.cup.seat,
+                                            loser.cup.seat, int(held), len(bid.history)))
+        payload += bytes(table.counts)
+        payload += pack_faces([face for seat in range(seats) for face in table.hand(seat)])
+        for rank, player in bid.history:
+            payload += BID.pack(rank, player.cup.seat)
+        self._append(ROUND, payload)
+
+    def extend(self, data):
+        if data[:HEADER.size] != HEADER.pack(MAGIC, VERSION):
+            raise ValueError("Not a game log of this version")
+        self.file.write(data[HEADER.size:])
+
+    def getvalue(self):
+        return self.file.getvalue()
+
+    def close(self):
+        self.file.close()
+
+
+def iter_frames(data, wanted=(GAME, ROUND)):
+    """
+    The (kind, offset, payload) frames of a log held in memory or mapped, skipping the other kinds
+    unread. The offset is where the frame starts.
+    """
+    position = HEADER.size
+    while position + FRAME.size <= len(data):
+        kind, length = FRAME.unpack_from(data, position)
+        if kind in wanted:
+            yield kind, position, data[position + FRAME.size:position + FRAME.size + length]
+        position += FRAME.size + length
+
+
+def game_offset(offset, payload):
+    """ where the record of a round's game starts, from the round's offset and payload """
+    return offset - ROUND_HEAD.unpack_from(payload)[1]
+
+
+def parse_game(payload, offset=None):
+    seed, seats, flags = GAME_HEAD.unpack_from(payload)
+    position = GAME_HEAD.size
+    records = []
+    for _ in range(seats):
+        texts = []
+        for _ in range(2):
+            length = payload[position]
+            texts.append(bytes(payload[position + 1:position + 1 + length]).decode())
+            position += 1 + length
+        records.append(SeatRecord(*texts, *SEAT.unpack_from(payload, position)))
+        position += SEAT.size
+    return GameRecord(offset, seed, bool(flags & WILD), bool(flags & CFR_STRATEGY), records)
+
+
+def parse_round(payload):
+    seed, _, turn, seats, bidder, challenger, loser, held, bids = ROUND_HEAD.unpack_from(payload)
+    position = ROUND_HEAD.size
+    counts = payload[position:position + seats]
+    position += seats
+    total = sum(counts)
+    faces = unpack_faces(payload[position:position + (total + 1) // 2], total)
+    position += (total + 1) // 2
+
+    hands = []
+    start = 0
+    for count in counts:
+        hands.append(faces[start:start + count])
+        start += count
+    bid_sequence = [BID.unpack_from(payload, position + i * BID.size) for i in range(bids)]
+    return RoundRecord(seed, turn, hands, bid_sequence, bidder, challenger, loser, bool(held))
+
+
+class GameLogReader:
+    """
+    Streams the records of a game log through a read-only memory map, never loading the whole file.
+
+    Methods:
+    - records(): Yields every GameRecord and RoundRecord in the order they were written.
+    - games(seed=None): Yields the GameRecords, of the games played from the seed when given.
+    - rounds(game=None): Yields the RoundRecords, of one logged game when its GameRecord is given.
+    - replay(game): Plays a logged game again through the engine.
+    - close(): Releases the mapping.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:HEADER.size] != HEADER.pack(MAGIC, VERSION):
+            self._mmap.close()
+            raise ValueError(f"{path} is not a game log of this version")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def records(self):
+        for kind, offset, payload in iter_frames(self._mmap):
+            yield parse_game(payload, offset) if kind == GAME else parse_round(payload)
+
+    def games(self, seed=None):
+        for _, offset, payload in iter_frames(self._mmap, (GAME,)):
+            # the seed leads every payload, so other games are skipped unparsed
+            if seed is None or GAME_HEAD.unpack_from(payload)[0] == seed:
+                yield parse_game(payload, offset)
+
+    def rounds(self, game=None):
+        for _, offset, payload in iter_frames(self._mmap, (ROUND,)):
+            if game is None or game_offset(offset, payload) == game.offset:
+                yield parse_round(payload)
+
+    def replay(self, record):
+        """
+        Plays a logged game again and returns its winner and the rounds it logged.
+
+        Computer seats decide again from the game seed and their logged settings, so their rounds
+        come out identical to the log; the other seats play their logged moves. The anytime and
+        tree search players depend on the clock and are replayed from their moves as well. A game
+        the CFR players played from a strategy needs the same strategy loaded (see cfr.load).
+        """
+        if record.cfr_strategy and CFRComputerPlayer.strategy is None:
+            raise ValueError(f"Game {record.seed} was played with a CFR strategy, load it before replaying the game")
+
+        moves = [[] for _ in record.seats]
+        for logged in self.rounds(record):
+            for rank, seat in logged.bids:
+                moves[seat].append(rank)
+            moves[logged.challenger].append(None)
+
+        players = []
+        for seat, logged in enumerate(record.seats):
+            if logged.player not in ENGINE_PLAYERS:
+                players.append(ReplayPlayer(logged.name, logged.dices, moves[seat]))
+                continue
+            # large table crews are named after their profile, so the threshold is passed rather than looked up
+            player = ENGINE_PLAYERS[logged.player](logged.name, logged.dices, gambler_threshold=logged.threshold)
+            player.frontier = logged.frontier or None
+            player.opening_count = logged.opening_count
+            player.opening_face = logged.opening_face
+            if not record.cfr_strategy and isinstance(player, CFRComputerPlayer):
+                player.strategy = None
+            players.append(player)
+
+        log = GameLog()
+        game = Game(renderer=NullRenderer(), seed=record.seed, log=log)
+        game.seat_players(players, record.is_wild)
+        winner = game.run()
+        replayed = [parse_round(payload) for _, _, payload in iter_frames(log.getvalue(), (ROUND,))]
+        return winner, replayed
+
+    def close(self):
+        self._mmap.close()
+
+
+class ReplayPlayer(BasePlayer):
+    """
+    Plays the logged moves of a seat in order.
+
+    Attributes:
+    - moves (list): The ranks the seat bid, None where it called 'Liar!'.
+    """
+
+    def __init__(self, name, number_of_dices, moves):
+        super().__init__(name, number_of_dices)
+        self.moves = iter(moves)
+
+    def decide(self, bid):
+        rank = next(self.moves)
+        if rank is None:
+            return self.challenge()
+        return self.place_bid(bid, *bid.decode(rank))
+
+
+def summarize(path):
+    """ streams the log once and counts its games, rounds, bids and held bids """
+    games = rounds = bids = held = 0
+    with GameLogReader(path) as reader:
+        for record in reader.records():
+            if isinstance(record, GameRecord):
+                games += 1
+            else:
+                rounds += 1
+                bids += len(record.bids)
+                held += record.held
+    return {'games': games, 'rounds': rounds, 'bids': bids, 'held': held}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read a Liar's Dice game log.")
+    parser.add_argument('path')
+    parser.add_argument('--replay', type=int, metavar='SEED', help="replay the games with this seed and check the log")
+    args = parser.parse_args()
+
+    if args.replay is None:
+        summary = summarize(args.path)
+        rounds = summary['rounds'] or 1
+        print(f"{summary['games']} games, {summary['rounds']} rounds, {summary['bids'] / rounds:.1f} bids per round, "
+              f"{summary['held'] / rounds:.1%} of the challenged bids held")
+        return
+
+    # the computer players decide with the same odds tables and strategy as in game.py
+    tables.load()
+    CFRComputerPlayer.strategy = cfr.load()
+    with GameLogReader(args.path) as reader:
+        records = list(reader.games(args.replay))
+        if not records:
+            raise SystemExit(f"No game with seed {args.replay} in the log")
+        # a log written more than once may hold a seed several times, each game is checked on its own
+        for record in records:
+            winner, replayed = reader.replay(record)
+            print(f"The winner be {winner.name} after {len(replayed)} rounds")
+            if replayed != list(reader.rounds(record)):
+                raise SystemExit("The replay doesn't match the log!")
+    print("Every round matches the log.")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,7 @@
 import random
 
+FACES = range(1, 7)
+
 
 class Dice:
     """
@@ -17,110 +19,228 @@ class Dice:
     def face(self):
         return self._face
 
-    def roll(self):
-        self._face = random.randint(1, 6)
+    def roll(self, rng=random):
+        self._face = rng.randint(1, 6)
         return self.face
 
     def __repr__(self):
         return str(self.face)
 
 
+class Table:
+    """
+    A class holding the dice of every cup at the table in one buffer.
+
+    Each cup owns a seat: a slice of the buffer starting at the seat's offset, of which the
+    first `counts[seat]` dice are still in play. Rolling the table rerolls every live die with
+    a single call to the generator and refreshes the face histogram of each seat.
+
+    Attributes:
+    - faces: A bytearray with the face value of every die at the table.
+    - offsets: The start of each seat in faces.
+    - counts: The number of dice each seat still has.
+    - histograms: The count of each face (index 1 to 6) for each seat.
+    - rng: The random generator the dice are rolled with.
+
+    Methods:
+    - add_seat: Reserves room for a cup and returns its seat.
+    - adopt: Moves a cup, with its dice, onto this table.
+    - roll: Rolls all the dice at the table.
+    - roll_seat: Rolls the dice of one seat.
+    - hand: Returns the dice of one seat as a list.
+    - remove_dice: Removes one die from a seat and returns False if no dice remain.
+    - totals: Returns the count of each face over the whole table.
+    """
+    __slots__ = ('faces', 'offsets', 'counts', 'histograms', 'rng')
+
+    def __init__(self, rng=random):
+        self.faces = bytearray()
+        self.offsets = []
+        self.counts = []
+        self.histograms = []
+        self.rng = rng
+
+    def add_seat(self, number_of_dices):
+        self.offsets.append(len(self.faces))
+        self.counts.append(number_of_dices)
+        self.histograms.append([0] * 7)
+        self.faces.extend(bytes(number_of_dices))
+        return len(self.offsets) - 1
+
+    def adopt(self, cup):
+        seat = self.add_seat(cup.number_of_dices)
+        start = self.offsets[seat]
+        self.faces[start:start + cup.number_of_dices] = bytes(cup.hand)
+        self.histograms[seat] = list(cup.histogram)
+        cup.table, cup.seat = self, seat
+        return seat
+
+    def _count_faces(self, seat):
+        start = self.offsets[seat]
+        dices = self.faces[start:start + self.counts[seat]]
+        self.histograms[seat] = [0] + [dices.count(face) for face in range(1, 7)]
+
+    def roll(self):
+        rolled = self.rng.choices(FACES, k=sum(self.counts))
+        position = 0
+        for seat, count in enumerate(self.counts):
+            start = self.offsets[seat]
+            self.faces[start:start + count] = bytes(rolled[position:position + count])
+            position += count
+            self._count_faces(seat)
+        return self
+
+    def roll_seat(self, seat):
+        start = self.offsets[seat]
+        count = self.counts[seat]
+        self.faces[start:start + count] = bytes(self.rng.choices(FACES, k=count))
+        self._count_faces(seat)
+
+    def hand(self, seat):
+        start = self.offsets[seat]
+        return list(self.faces[start:start + self.counts[seat]])
+
+    def remove_dice(self, seat):
+        self.counts[seat] -= 1
+        self._count_faces(seat)
+        return self.counts[seat] > 0
+
+    def totals(self):
+        return [sum(column) for column in zip(*self.histograms)]
+
+
 class Cup:
     """
     A class representing a cup holding multiple dice.
 
+    The dice live in a Table; a cup made on its own gets a table with a single seat
+    until a game adopts it.
+
     Attributes:
     - number_of_dices: The total number of dice in the cup.
-    - hand: A list of Dice objects representing the dice in the cup.
+    - hand: A list with the face values of the dice in the cup.
+    - histogram: The count of each face (index 1 to 6) in the cup.
 
     Methods:
     - roll: Rolls all the dice in the cup.
     - remove_dice: Removes one die from the cup and returns False if no dice remain.
     """
+    __slots__ = ('table', 'seat')
 
-    def __init__(self, number_of_dices):
-        self.number_of_dices = number_of_dices
-        self._dices = [Dice() for _ in range(self.number_of_dices)]
+    def __init__(self, number_of_dices, table=None):
+        self.table = table or Table()
+        self.seat = self.table.add_seat(number_of_dices)
+
+    @property
+    def number_of_dices(self):
+        return self.table.counts[self.seat]
 
     @property
     def hand(self):
-        return self._dices
+        return self.table.hand(self.seat)
+
+    @property
+    def histogram(self):
+        return self.table.histograms[self.seat]
 
     def roll(self):
-        self._dices = [Dice() for _ in range(self.number_of_dices)]
-        self._dices = [dice.roll() for dice in self._dices]
+        self.table.roll_seat(self.seat)
         return self
 
     def remove_dice(self):
-        self.number_of_dices -= 1
-        if self.number_of_dices == 0:
-            return False
-        return True
+        return self.table.remove_dice(self.seat)
 
     def __str__(self):
-        return f'{[dice for dice in self.hand]}'
+        return f'{self.hand}'
 
 
 class Bid:
     """
     A class representing the bidding system in the game.
 
+    A bid is stored as an integer rank, (face - 1) * total_dices + (count - 1), so bids are
+    totally ordered: a raise is valid when its rank is higher, and all valid raises form a range.
+
     Attributes:
     - total_dices: The total number of dice in the game.
-    - current_bid: The current bid in the game.
+    - rank: The rank of the current bid, NO_BID before the first bid of a round.
+    - last_rank: The rank of the previous bid.
+    - current_bid: The current bid in the game as a dict of count and face.
     - last_bid: The previous bid placed in the game.
+    - count, face: The count and face of the current bid.
+    - current_player: The player who placed the current bid.
+    - history: The (rank, player) of every bid placed this round, in order.
+    - round: The number of rounds played with this bid, so readers can tell rounds apart.
+    - error: The reason the last invalid bid was rejected.
 
     Methods:
+    - encode: Returns the rank of a count and face.
+    - decode: Returns the count and face of a rank.
     - check_bid_validity: Validates the bid made by a player.
     - place_bid: Places a valid bid and updates the current bid.
+    - legal_raises: Returns the range of ranks that may be bid next.
+    - reset: Clears the bids at the end of a round.
     - dice_counter: Counts the frequency of each dice face in a list of dice.
     """
-    current_player = None
+    NO_BID = -1
 
     def __init__(self, total_dices):
         self.total_dices = total_dices
-        self.last_bid = None
-        self.current_bid = None
-
-    def check_bid_validity(self, count, face):
+        self.rank = self.NO_BID
+        self.last_rank = self.NO_BID
+        self.current_player = None
+        self.history = []
+        self.round = 0
+        self.error = None
+
+    def encode(self, count, face):
+        return (face - 1) * self.total_dices + count - 1
+
+    def decode(self, rank):
+        face, count = divmod(rank, self.total_dices)
+        return count + 1, face + 1
+
+    def _as_dict(self, rank):
+        if rank == self.NO_BID:
+            return None
+        count, face = self.decode(rank)
+        return {'count': count, 'face': face}
 
-        if self.current_bid is None:
-            self.current_bid = {}
-        else:
-            self.last_bid = self.current_bid
-
-        try:
-
-            if count > self.total_dices or count <= 0:
-                raise ValueError(
-                    "Arrr! The count can't be zero, negative, or greater than the total number o' dice in play, ye scallywag!")
+    @property
+    def current_bid(self):
+        return self._as_dict(self.rank)
 
-            if int(face) not in range(1, 7):
-                raise ValueError("Ye face value must be between 1 and 6, matey! No foolin' around with improper faces!")
+    @property
+    def last_bid(self):
+        return self._as_dict(self.last_rank)
 
-            # the player can bid any count of a higher face
-            if face < self.last_bid['face']:
-                # if the face is lower
-                raise ValueError("Ye need to place a proper bid, or ye’ll be feedin’ the fish!")
+    @property
+    def count(self):
+        return self.rank % self.total_dices + 1
 
-            # the player can bid a higher count of the same face
-            elif face == self.last_bid['face']:
-                # the count is higher than last
-                if count <= self.last_bid['count']:
-                    raise ValueError("Ye need to place a proper bid, or ye’ll be feedin’ the fish!")
+    @property
+    def face(self):
+        return self.rank // self.total_dices + 1
 
-        except ValueError as v:
-            print(v)
+    def check_bid_validity(self, count, face):
+        if count > self.total_dices or count <= 0:
+            self.error = "Arrr! The count can't be zero, negative, or greater than the total number o' dice in play, ye scallywag!"
             return False
 
-        except TypeError:
-            return True
+        if face not in range(1, 7):
+            self.error = "Ye face value must be between 1 and 6, matey! No foolin' around with improper faces!"
+            return False
 
-        except KeyError:
-            return True
+        # the player can bid a higher count of the same face or any count of a higher face
+        if self.encode(count, face) <= self.rank:
+            self.error = "Ye need to place a proper bid, or ye’ll be feedin’ the fish!"
+            return False
 
         return True
 
+    def legal_raises(self):
+        return range(self.rank + 1, 6 * self.total_dices)
+
     @classmethod
     def dice_counter(cls, dices):
 
@@ -129,14 +249,23 @@ class Bid:
     def place_bid(self, count, face, player):
         # check if the bid is valid and set the current bid
         if self.check_bid_validity(count, face):
-            self.current_bid = {'count': count, 'face': face}
+            self.last_rank = self.rank
+            self.rank = self.encode(count, face)
+            self.history.append((self.rank, player))
             self.current_player = player
             return True
 
         return False
 
+    def reset(self):
+        self.rank = self.NO_BID
+        self.last_rank = self.NO_BID
+        self.current_player = None
+        self.history = []
+        self.round += 1
+
     def __str__(self):
-        if self.current_bid:
-            return f"\nHere be the current bid, ye landlubber:\n Count: {self.current_bid['count']}\n Face: {self.current_bid['face']}'s"
+        if self.rank != self.NO_BID:
+            return f"\nHere be the current bid, ye landlubber:\n Count: {self.count}\n Face: {self.face}'s"
         else:
             return "\nArrr, there be no bid placed yet, matey! Make yer move!"
@@ -0,0 +1,176 @@
+import math
+import time
+from collections import namedtuple
+
+from cfr import CHALLENGE, abstract_actions
+from items import FACES
+from probability import bid_probability
+
+
+def histogram_of(dices):
+    return (0,) + tuple(dices.count(face) for face in FACES)
+
+
+def matching(histogram, face, is_wild):
+    """ the dice of a histogram that count towards the face """
+    if is_wild and face != 1:
+        return histogram[face] + histogram[1]
+    return histogram[face]
+
+
+class RoundState(namedtuple('RoundState', 'counts hands rank bidder player is_wild loser')):
+    """
+    An immutable snapshot of a round, cheap to share between search paths.
+
+    Every move returns a new state and leaves the old one untouched, so a state is cloned by
+    simply keeping a reference to it. Seats are the table seats, the actions are the ones of
+    cfr.abstract_actions: CHALLENGE or the rank of a bid plus one.
+
+    Attributes:
+    - counts (tuple): The number of dice of every seat, 0 once out.
+    - hands (tuple): The face histogram of every seat, None for the hands the observer can't see.
+    - rank (int): The rank of the current bid, -1 before the first bid.
+    - bidder (int): The seat of the current bid, -1 before the first bid.
+    - player (int): The seat to move.
+    - is_wild (bool): Flag indicating if 1's are wild.
+    - loser (int): The seat that lost the challenge, None until the round is over.
+
+    Methods:
+    - observe(player, bid): Returns the round as the player sees it.
+    - determinize(rng): Returns the state with the hidden hands rolled.
+    - actions(): Returns the actions of the player to move.
+    - apply(action): Returns the state after the action.
+    - reward(seat): Returns 1.0 if the seat kept its dice in the round, 0.0 if it lost one.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def observe(cls, player, bid):
+        table = player.cup.table
+        hands = [None] * len(table.counts)
+        hands[player.cup.seat] = tuple(player.cup.histogram)
+        bidder = bid.history[-1][1].cup.seat if bid.history else -1
+        return cls(tuple(table.counts), tuple(hands), bid.rank, bidder, player.cup.seat, player.is_wild, None)
+
+    @property
+    def total_dices(self):
+        return sum(self.counts)
+
+    @property
+    def is_terminal(self):
+        return self.loser is not None
+
+    def determinize(self, rng):
+        hands = tuple(hand if hand is not None else histogram_of(rng.choices(FACES, k=count))
+                      for hand, count in zip(self.hands, self.counts))
+        return self._replace(hands=hands)
+
+    def actions(self):
+        return abstract_actions(self.rank, self.total_dices)
+
+    def next_seat(self, seat):
+        seats = len(self.counts)
+        for step in range(1, seats + 1):
+            following = (seat + step) % seats
+            if self.counts[following]:
+                return following
+        return seat
+
+    def apply(self, action):
+        if action != CHALLENGE:
+            return self._replace(rank=action - 1, bidder=self.player, player=self.next_seat(self.player))
+
+        total = self.total_dices
+        face, count = self.rank // total + 1, self.rank % total + 1
+        present = sum(matching(hand, face, self.is_wild) for hand in self.hands)
+        return self._replace(loser=self.player if present >= count else self.bidder)
+
+    def reward(self, seat):
+        return 0.0 if seat == self.loser else 1.0
+
+
+class Node:
+    """
+    A node of the search tree, reached by one action from its parent.
+
+    Attributes:
+    - action (int): The action leading to the node.
+    - mover (int): The seat that took it, the node's value is from that seat's point of view.
+    - visits (int): The number of iterations through the node.
+    - value (float): The total reward of the mover over those iterations.
+    - children (dict): The child nodes by action.
+    - untried (list): The actions not expanded yet, None until the node is first reached.
+    """
+    __slots__ = ('action', 'mover', 'visits', 'value', 'children', 'untried')
+
+    def __init__(self, action=None, mover=None):
+        self.action = action
+        self.mover = mover
+        self.visits = 0
+        self.value = 0.0
+        self.children = {}
+        self.untried = None
+
+    def select(self, exploration):
+        log_visits = math.log(self.visits)
+        return max(self.children.values(),
+                   key=lambda child: child.value / child.visits + exploration * math.sqrt(log_visits / child.visits))
+
+    def best_action(self):
+        return max(self.children.values(), key=lambda child: child.visits).action
+
+
+def rollout_action(state, rng):
+    """ the mover calls 'Liar!' on a bid it gives less than even odds, otherwise raises at random """
+    actions = state.actions()
+    if state.rank >= 0:
+        total = state.total_dices
+        face, count = state.rank // total + 1, state.rank % total + 1
+        hand = state.hands[state.player]
+        known = matching(hand, face, state.is_wild)
+        unknown = total - state.counts[state.player]
+        if len(actions) == 1 or bid_probability(count, face, unknown, known, state.is_wild) < 0.5:
+            return CHALLENGE
+        return actions[rng.randrange(1, len(actions))]
+    return actions[rng.randrange(len(actions))]
+
+
+def search(root, state, rng, deadline, max_iterations=5000, exploration=0.7):
+    """
+    Runs determinized Monte Carlo tree search from the root until the deadline.
+
+    Every iteration rolls the hidden hands anew and walks the tree with UCB1, each seat picking
+    for itself, expands one action, plays the round out with the rollout policy and credits
+    every node on the path with the reward of its mover. The actions only depend on the bid,
+    so the same tree holds for every roll.
+
+    Returns:
+    - int: The number of iterations run.
+    """
+    iterations = 0
+    while iterations < max_iterations and (not iterations or time.perf_counter() < deadline):
+        world = state.determinize(rng)
+        node = root
+        path = []
+        while not world.is_terminal:
+            if node.untried is None:
+                node.untried = list(world.actions())
+            if node.untried:
+                action = node.untried.pop(rng.randrange(len(node.untried)))
+                child = node.children[action] = Node(action, world.player)
+                world = world.apply(action)
+                path.append(child)
+                break
+            node = node.select(exploration)
+            world = world.apply(node.action)
+            path.append(node)
+
+        while not world.is_terminal:
+            world = world.apply(rollout_action(world, rng))
+
+        root.visits += 1
+        for node in path:
+            node.visits += 1
+            node.value += world.reward(node.mover)
+        iterations += 1
+    return iterations
@@ -1,9 +1,16 @@
-import itertools
+import math
 import random
 import time
 from abc import ABC, abstractmethod
 
-from items import Cup, Dice, Bid
+from beliefs import BeliefModel
+from cache import decision_cache
+from cfr import CHALLENGE, infoset_key
+from items import Cup, Bid, FACES
+from mcts import Node, RoundState, search
+from probability import bid_probability, face_odds, matching_dices, odds_by_rank, score_bids
+from renderers import NullRenderer
+from sampling import FaceSampler, wilson_interval
 
 
 class BasePlayer(ABC):
@@ -11,24 +18,31 @@ class BasePlayer(ABC):
     A base class for all players (human and computer) in the game of Liar's Dice.
 
     Attributes:
-    - total_dices (int): Total number of dice in the game.
-    - is_wild (bool): Flag indicating if the game is in wild mode (1's are wild).
+    - total_dices (int): Total number of dice in the game, set by the game before every turn.
+    - is_wild (bool): Flag indicating if the game is in wild mode (1's are wild), set when seated.
+    - renderer (BaseRenderer): Receives the player's events, silent until the game seats the player.
+    - rng (Random): The player's own random generator, set from the game seed when seated.
+    - stats (GameStats): The game's statistics, None unless the game records them.
 
     Methods:
     - decide(bid): Abstract method to make a decision for the player's turn.
     - place_bid(bid, count, face): Place a valid bid for the player.
     - challenge(): Static method to challenge the current bid by calling 'Liar!'.
     - take_turn(bid): Handles the player's turn, either placing a bid or challenging.
+    - finish_turn(bid, result): Reports the decision of a turn.
+    - turn_message(bid): Returns the "your_turn" message of network clients and external bots.
     - win(): Declares the player as the winner of the round.
     - lose(bid): Handles the player losing a round and losing a die.
     """
-    total_dices = None
-    is_wild = False
-
     def __init__(self, name, number_of_dices):
         self.cup = Cup(number_of_dices).roll()
         self.name = name
         self.is_playing = True
+        self.total_dices = None
+        self.is_wild = False
+        self.renderer = NullRenderer()
+        self.rng = random
+        self.stats = None
 
     @abstractmethod
     def decide(self, bid):
@@ -47,24 +61,52 @@ class BasePlayer(ABC):
         return 'Liar!'
 
     def take_turn(self, bid):
-        print(f"{bid}\n")
-        result = self.decide(bid)
-        print(result)
+        self.renderer.turn_started(self, bid)
+        if self.stats is None:
+            result = self.decide(bid)
+        else:
+            result = self.stats.time_decision(self, bid)
+        return self.finish_turn(bid, result)
+
+    def finish_turn(self, bid, result):
+        """ reports the decision and returns True if the player called 'Liar!' """
         if result == 'Liar!':
+            self.renderer.challenge(self, bid)
             return True
-        time.sleep(1)
+        self.renderer.bid_placed(self, bid, result)
+        return False
+
+    def turn_message(self, bid):
+        """ what a seat played outside the process is told on its turn, as JSON-ready values """
+        return {'event': 'your_turn', 'player': self.name, 'hand': self.cup.hand, 'total_dices': bid.total_dices,
+                'bid': bid.current_bid, 'wild': self.is_wild}
 
     def win(self):
-        print(f"Arrr, {self.name} won this round, ye lucky sea rat! Fortune be smilin' on ye today!")
+        self.renderer.round_won(self)
 
     def loose(self, bid):
         result = self.cup.remove_dice()
         bid.total_dices -= 1
-        print(f"{self.name} lost this one, ye scurvy dog! Better luck next time, or ye’ll be walkin' the plank!")
+        self.renderer.die_lost(self)
         if not result:
-            print(f"Arrr, {self.name} be out o' the game! The sea's a harsh mistress!")
+            self.renderer.player_eliminated(self)
             self.is_playing = False
 
+    def __getstate__(self):
+        # the renderer and stats belong to the process hosting the game, e.g. when deciding in a worker
+        state = self.__dict__.copy()
+        state['renderer'] = None
+        state['stats'] = None
+        if state['rng'] is random:
+            state['rng'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.renderer = NullRenderer()
+        if self.rng is None:
+            self.rng = random
+
     def __str__(self):
         return self.name
 
@@ -91,9 +133,10 @@ class HumanPlayer(BasePlayer):
                     continue
                 if result:
                     return result
+                print(bid.error)
 
             elif choice == '2':
-                if not bid.current_bid:
+                if bid.rank == bid.NO_BID:
                     print("Arrr, there be no one to call a liar just yet! Ye best place yer bid, ye scallywag!")
                     continue
                 return self.challenge()
@@ -105,14 +148,27 @@ class ComputerPlayer(BasePlayer):
 
     Attributes:
     - gambler (dict): A dictionary containing different player types and their gamble thresholds.
+    - gambler_threshold (float): The player's threshold, from gambler unless given.
+    - opening_count (int), opening_face (int): The highest count and face of an opening bid.
+    - simulations (int): The number of simulated rolls so far, reset per decision when stats are recorded.
+    - cache (DecisionCache): The odds of recent situations, shared by the computer players; None to always compute them.
+    - frontier (int): For large tables, the counts per face weighed around its expected count; None to weigh every raise.
+    - frontier_spread (float): The standard deviations either side of the expected count the frontier spans.
 
     Methods:
-    - generate_combinations(bid): Generates all possible bid combinations.
+    - generate_combinations(bid): Lazily generates the raises to weigh as (quantity, face) tuples.
+    - frontier_ranks(bid): Returns the ranks of the frontier raises, in order.
     - new_bid_count_and_face(): Generates a new bid with a random count and face.
     - decide(bid): Makes a decision to place a bid or call 'Liar!' based on probability.
+    - choose(bid): Returns the decision, 'Liar!' or a (quantity, face) tuple, without placing it.
+    - apply_choice(bid, choice): Places the chosen bid or calls 'Liar!'.
+    - choose_from_odds(bid, odds): Chooses like choose(bid) once a bid has been placed, given the odds by rank.
+    - odds_key(bid): Returns the key of the odds of the round in the cache.
+    - bid_odds(bid): Returns the probability of every bid by rank from the cache, None without a cache or with a frontier.
     - generate_probabilities(combinations): Calculates probabilities for each bid combination.
     - extract_quantity_face(*args): Extracts the count and face from a bid or arguments.
-    - calculate_bid_proba(quantity, face, sim=10000): Calculates the probability of a successful bid.
+    - calculate_bid_proba(quantity, face): Calculates the exact probability of a successful bid.
+    - simulate_bid_proba(quantity, face, sim=10000): Estimates the same probability by simulation.
     """
     gambler = {
         "Cap'n Scattershot": 0.5,
@@ -121,126 +177,186 @@ class ComputerPlayer(BasePlayer):
         "Ironhook Steady": 0.4,
         "Barnacle Bill the Unshaken": 0.3,
     }
-
-    def __init__(self, name, number_of_dices):
+    cache = decision_cache
+    # the highest count and face of an opening bid
+    opening_count = 3
+    opening_face = 3
+    frontier = None
+    frontier_spread = 2.5
+
+    def __init__(self, name, number_of_dices, gambler_threshold=None):
         super().__init__(name, number_of_dices)
-        self.gambler_threshold = self.gambler[name]
+        self.gambler_threshold = self.gambler[name] if gambler_threshold is None else gambler_threshold
         self.is_computer = True
+        self.simulations = 0
 
     def generate_combinations(self, bid):
-        # extract the current bid values
-        bid_quantity, bid_face = self.extract_quantity_face(bid)
-
-        # for higher faces than current, all possible counts are valid
-        bigger_faces = [x for x in range(bid_face + 1, 7)]
-        all_quantities = [x for x in range(1, bid.total_dices + 1)]
-        combinations = list(itertools.product(all_quantities, bigger_faces))
-
-        # for the same face, only larger
-        same_face = [bid_face]
-        larger_quantities = [x for x in range(bid_quantity + 1, bid.total_dices + 1)]
-        combinations += list(itertools.product(larger_quantities, same_face))
-
-        return combinations
+        # every rank above the current bid is a valid raise
+        if self.frontier is None:
+            return map(bid.decode, bid.legal_raises())
+        return map(bid.decode, self.frontier_ranks(bid))
+
+    def frontier_ranks(self, bid):
+        """
+        The raises a large table is weighed by: a fixed number of counts per face spread around
+        its expected count, so the work per decision doesn't grow with the dice in play.
+
+        The lowest legal count of every face is kept as well. It is the likeliest raise of its
+        face, so the likeliest raise of the frontier is the likeliest of all the legal raises.
+        """
+        unknown_dices = self.unknown_dices()
+        ranks = set()
+        for face in range(1, 7):
+            first = max(bid.encode(1, face), bid.rank + 1)
+            last = bid.encode(bid.total_dices, face)
+            if first > last:
+                continue
+            ranks.add(first)
+
+            odds = face_odds(face, self.is_wild)
+            expected = matching_dices(self.cup.histogram, face, self.is_wild) + unknown_dices * odds
+            spread = self.frontier_spread * math.sqrt(unknown_dices * odds * (1 - odds))
+            step = 2 * spread / (self.frontier - 1) if self.frontier > 1 else 0
+            for i in range(self.frontier):
+                count = round(expected - spread + i * step)
+                if 1 <= count <= bid.total_dices:
+                    ranks.add(max(bid.encode(count, face), first))
+        return sorted(ranks)
 
     def new_bid_count_and_face(self):
         """ calculates the new bid count and face """
         # setting face counts
-        end_range = 3
+        end_range = self.opening_count
         if self.cup.number_of_dices <= end_range:
             end_range = self.cup.number_of_dices - 1
             if end_range <= 0:
                 end_range = 1
 
-        quantity = random.randint(1, end_range)
+        quantity = self.rng.randint(1, end_range)
 
         # to start lower
-        face = random.randint(1, 3)
+        face = self.rng.randint(1, self.opening_face)
 
         return quantity, face
 
     def decide(self, bid):
         """calculate proba and make a decision"""
+        return self.apply_choice(bid, self.choose(bid))
+
+    def apply_choice(self, bid, choice):
+        if choice == 'Liar!':
+            return self.challenge()
+        quantity, face = choice
+        return self.place_bid(bid, quantity, face)
+
+    def choose(self, bid):
+        """calculate proba and choose a bid or a challenge, leaving the bid untouched"""
+
+        if bid.rank == bid.NO_BID:
+            return self.new_bid_count_and_face()
 
-        if not bid.current_bid:
-            quantity, face = self.new_bid_count_and_face()
-            return self.place_bid(bid, quantity, face)
+        return self.choose_from_odds(bid, self.bid_odds(bid))
+
+    def choose_from_odds(self, bid, odds):
+        """choose against the odds of every bid by rank, or work them out bid by bid when odds is None"""
 
         quantity, face = self.extract_quantity_face(bid)
 
-        proba = self.calculate_bid_proba(quantity, face)
+        proba = self.calculate_bid_proba(quantity, face) if odds is None else odds[bid.rank]
 
         # the bid is probable so place a bid
         if proba > self.gambler_threshold:
 
-            # generate combinations
-            combinations = self.generate_combinations(bid)
-
             # if no combinations left, challenge the player
-            if not combinations:
+            if not bid.legal_raises():
                 return self.challenge()
 
-            # calculate probabs
-            result_proba = self.generate_probabilities(combinations)
+            # calculate probabs of the combinations, in rank order above the current bid
+            if odds is None:
+                combinations = list(self.generate_combinations(bid))
+                raises = [proba for proba, _ in self.generate_probabilities(combinations)]
+                ranks = [bid.encode(quantity, face) for quantity, face in combinations]
+            else:
+                raises = odds[bid.rank + 1:]
+                ranks = bid.legal_raises()
+
+            if self.stats is not None:
+                self.stats.candidates.observe(len(ranks))
 
             # select calculation bss model
-            for _ in range(100):
-                choice = random.choice(result_proba)
-                if choice[0] > 1 - self.gambler_threshold:
-                    quantity, face = choice[1]
-                    return self.place_bid(bid, quantity, face)
+            for index in self.rng.choices(range(len(raises)), k=100):
+                if raises[index] > 1 - self.gambler_threshold:
+                    return bid.decode(ranks[index])
 
             # if not suitable choice, then take the higher prob combination
-            quantity, face = sorted(result_proba, key=lambda x: x[0], reverse=True)[0][1]
-            return self.place_bid(bid, quantity, face)
+            return bid.decode(ranks[raises.index(max(raises))])
 
         else:
             # the bit is not probable so challenge last player
             return self.challenge()
 
+    def odds_key(self, bid):
+        """ what the odds of the round depend on: the own histogram, the dice in play and the wild flag """
+        return tuple(self.cup.histogram), bid.total_dices, self.is_wild
+
+    def bid_odds(self, bid):
+        """ the exact probability of every bid of the round by rank, shared through the cache, None without one """
+        if self.cache is None or self.frontier is not None:
+            return None
+
+        key = self.odds_key(bid)
+        odds = self.cache.get(key)
+        if odds is None:
+            odds = odds_by_rank(*key)
+            self.cache.put(key, odds)
+        return odds
+
     def generate_probabilities(self, combinations):
-        result_probabilities = []
-        for com in combinations:
-            quantity, face = com
-            result = self.calculate_bid_proba(quantity, face, 1000)
-            result_probabilities.append((result, com))
-        return result_probabilities
+        return score_bids(combinations, self.cup.histogram, self.unknown_dices(), self.is_wild)
 
     @staticmethod
     def extract_quantity_face(*args):
         if len(args) == 1:
             bid = args[0]
             # get the face of the current bid
-            face = bid.current_bid['face']
-            quantity = bid.current_bid['count']
+            face = bid.face
+            quantity = bid.count
         else:
             quantity, face = args
 
         return quantity, face
 
-    def calculate_bid_proba(self, quantity, face, sim=10000):
+    def unknown_dices(self):
+        """ the number of dice in play hidden from this player """
+        return max(self.total_dices - self.cup.number_of_dices, 0)
 
-        # extract the number of faces in the current player's cup
-        face_in_cup = self.cup.hand.count(face)
+    def calculate_bid_proba(self, quantity, face):
+        # extract the number of faces in the current player's cup, ones included in the wild version
+        face_in_cup = matching_dices(self.cup.histogram, face, self.is_wild)
+
+        return bid_probability(quantity, face, self.unknown_dices(), face_in_cup, self.is_wild)
+
+    def simulate_bid_proba(self, quantity, face, sim=10000):
+        """ Monte Carlo estimate of calculate_bid_proba, kept as a reference """
 
-        # add ones to calculate proba
-        if self.is_wild and face != 1:
-            face_in_cup += self.cup.hand.count(1)
+        # extract the number of faces in the current player's cup
+        face_in_cup = matching_dices(self.cup.histogram, face, self.is_wild)
 
-        # generate the number of dices bss the current face in player's cup
-        all_dice = self.total_dices - face_in_cup
+        # the dice hidden under the other players' cups
+        all_dice = self.unknown_dices()
 
         # run simulations
+        self.simulations += sim
         valid_bid_count = 0
         for _ in range(sim):
-            all_dice_rolled = [Dice().roll() for _ in range(all_dice)]
+            all_dice_rolled = self.rng.choices(FACES, k=all_dice)
 
             # add the players dices
             if face_in_cup > 0:
                 all_dice_rolled.extend([face] * face_in_cup)
 
             # get the counter of the face count
-            counter = Bid(all_dice).dice_counter(all_dice_rolled)
+            counter = Bid.dice_counter(all_dice_rolled)
 
             # account for the wild version
             if self.is_wild and face != 1:
@@ -251,3 +367,231 @@ class ComputerPlayer(BasePlayer):
                 valid_bid_count += 1
 
         return valid_bid_count / sim
+
+
+class AnytimeComputerPlayer(ComputerPlayer):
+    """
+    A computer player that estimates its odds by simulation within a time budget per decision.
+
+    Rolls are drawn in batches and shared by every bid weighed in the decision. Sampling stops
+    as soon as the Wilson interval of each estimate lies clear of the threshold it is compared
+    with, so clear-cut decisions take a batch or two and only close calls use the whole budget.
+
+    Attributes:
+    - budget (float): The seconds of sampling allowed per decision.
+    - batch (int): The number of rolls drawn between two checks of the intervals.
+    - max_samples (int): The most rolls drawn per decision, whatever the budget.
+    - z (float): The z-score of the confidence intervals.
+    - samples (int): The number of rolls behind the estimates of the current decision.
+
+    Methods:
+    - new_decision(): Starts the budget and a new set of rolls, the estimates before the next decision share them.
+    - choose(bid): Starts a new decision, then chooses like a ComputerPlayer.
+    - calculate_bid_proba(quantity, face): Samples until the estimate is clear of the gambler threshold.
+    - generate_probabilities(combinations): Samples until every estimate is clear of the raise threshold.
+    """
+    # the estimates depend on the rolls drawn, not only on the hand
+    cache = None
+
+    def __init__(self, name, number_of_dices, budget=0.005, batch=50, max_samples=10000, z=1.96):
+        super().__init__(name, number_of_dices)
+        self.budget = budget
+        self.batch = batch
+        self.max_samples = max_samples
+        self.z = z
+        self._deadline = None
+        self._sampler = None
+
+    def new_decision(self):
+        """ starts the budget and a new set of rolls """
+        self._deadline = time.perf_counter() + self.budget
+        self._sampler = None
+
+    @property
+    def samples(self):
+        """ the rolls behind the estimates of the current decision """
+        return self._sampler.samples if self._sampler is not None else 0
+
+    def choose(self, bid):
+        self.new_decision()
+        return super().choose(bid)
+
+    def _rolls(self):
+        if self._sampler is None:
+            self._sampler = FaceSampler(self.unknown_dices(), self.is_wild, self.rng)
+        return self._sampler
+
+    def _sample_until(self, settled):
+        """ draws batches until settled() holds, the budget runs out or max_samples is reached """
+        sampler = self._rolls()
+        while sampler.samples < self.max_samples:
+            if sampler.samples and (settled() or time.perf_counter() >= self._deadline):
+                break
+            count = min(self.batch, self.max_samples - sampler.samples)
+            sampler.draw(count)
+            self.simulations += count
+        return sampler
+
+    def _clear_of(self, threshold, needed, face):
+        sampler = self._sampler
+        low, high = wilson_interval(sampler.successes(face, needed), sampler.samples, self.z)
+        return low > threshold or high <= threshold
+
+    def calculate_bid_proba(self, quantity, face):
+        needed = quantity - matching_dices(self.cup.histogram, face, self.is_wild)
+        if needed <= 0:
+            return 1.0
+        if needed > self.unknown_dices():
+            return 0.0
+
+        sampler = self._sample_until(lambda: self._clear_of(self.gambler_threshold, needed, face))
+        return sampler.successes(face, needed) / sampler.samples
+
+    def generate_probabilities(self, combinations):
+        unknown_dices = self.unknown_dices()
+        bids = [(quantity - matching_dices(self.cup.histogram, face, self.is_wild), (quantity, face))
+                for quantity, face in combinations]
+        # only the bids that could go either way need samples
+        open_bids = [(needed, face) for needed, (quantity, face) in bids if 0 < needed <= unknown_dices]
+        threshold = 1 - self.gambler_threshold
+
+        sampler = self._sample_until(lambda: all(self._clear_of(threshold, needed, face) for needed, face in open_bids))
+        return [(sampler.successes(face, needed) / sampler.samples, (quantity, face))
+                for needed, (quantity, face) in bids]
+
+
+class MCTSComputerPlayer(ComputerPlayer):
+    """
+    A computer player that looks ahead with determinized Monte Carlo tree search (see mcts.py).
+
+    The search runs within a time budget per move. The subtree below its own move is kept, and
+    when its next turn comes in the same round after bids the tree already holds, the search
+    picks up from there instead of starting over.
+
+    Attributes:
+    - budget (float): The seconds of search allowed per decision.
+    - max_iterations (int): The most iterations per decision, whatever the budget.
+    - exploration (float): The UCB1 exploration constant.
+    - iterations (int): The number of iterations of the last decision.
+
+    Methods:
+    - choose(bid): Searches from the current bid and returns the most visited action.
+    - reused_root(bid): Returns the kept subtree for the current bid, or a new root.
+    """
+    # the decisions depend on the search, not only on the hand
+    cache = None
+
+    def __init__(self, name, number_of_dices, budget=0.02, max_iterations=5000, exploration=0.7):
+        super().__init__(name, number_of_dices)
+        self.budget = budget
+        self.max_iterations = max_iterations
+        self.exploration = exploration
+        self.iterations = 0
+        # the round, the actions from its start and the node they lead to
+        self._tree = None
+
+    def reused_root(self, bid):
+        path = [rank + 1 for rank, _ in bid.history]
+        if self._tree is not None:
+            round_key, kept_path, node = self._tree
+            if round_key == (id(bid), bid.round) and path[:len(kept_path)] == kept_path:
+                for action in path[len(kept_path):]:
+                    node = node.children.get(action)
+                    if node is None:
+                        break
+                else:
+                    return node, path
+        return Node(), path
+
+    def choose(self, bid):
+        deadline = time.perf_counter() + self.budget
+        root, path = self.reused_root(bid)
+        self.iterations = search(root, RoundState.observe(self, bid), self.rng, deadline, self.max_iterations,
+                                 self.exploration)
+        self.simulations += self.iterations
+
+        action = root.best_action()
+        self._tree = ((id(bid), bid.round), path + [action], root.children[action])
+        if action == CHALLENGE:
+            return self.challenge()
+        return bid.decode(action - 1)
+
+
+class BayesianComputerPlayer(ComputerPlayer):
+    """
+    A computer player that reads the other players' bids as hints about their hands.
+
+    Attributes:
+    - beliefs (BeliefModel): The posterior over the opponents' dice, updated at the start of every decision.
+
+    Methods:
+    - choose(bid): Updates the beliefs with the new bids and chooses like a ComputerPlayer.
+    - calculate_bid_proba(quantity, face): The probability of a bid under the beliefs.
+    - generate_probabilities(combinations): Scores every combination under the beliefs.
+    """
+    # the odds depend on the bids of the round, not only on the hand
+    cache = None
+
+    def __init__(self, name, number_of_dices, trust=5.0, gambler_threshold=None):
+        super().__init__(name, number_of_dices, gambler_threshold)
+        self.beliefs = BeliefModel(self, trust)
+
+    def choose(self, bid):
+        self.beliefs.update(bid)
+        return super().choose(bid)
+
+    def calculate_bid_proba(self, quantity, face):
+        needed = quantity - matching_dices(self.cup.histogram, face, self.is_wild)
+        unknown_dices = self.unknown_dices()
+        if needed <= 0:
+            return 1.0
+        if needed > unknown_dices:
+            return 0.0
+        return self.beliefs.tail(face, unknown_dices, self.is_wild)[needed]
+
+    def generate_probabilities(self, combinations):
+        unknown_dices = self.unknown_dices()
+        return score_bids(combinations, self.cup.histogram, unknown_dices, self.is_wild,
+                          lambda face: self.beliefs.tail(face, unknown_dices, self.is_wild))
+
+
+class CFRComputerPlayer(ComputerPlayer):
+    """
+    A computer player that plays heads-up rounds from a strategy trained offline with CFR (see cfr.py).
+
+    With more than two players at the table, or in a situation the table doesn't cover,
+    it decides like a ComputerPlayer.
+
+    Attributes:
+    - strategy (StrategyTable): The trained strategy shared by all CFR players, None until loaded.
+
+    Methods:
+    - choose(bid): Looks the situation up in the strategy table and bids or challenges.
+    - strategy_choice(bid): Returns the action from the table, or None if it can't be used.
+    """
+    strategy = None
+
+    def choose(self, bid):
+        choice = self.strategy_choice(bid)
+        if choice is None:
+            return super().choose(bid)
+        if choice == CHALLENGE:
+            return self.challenge()
+        return bid.decode(choice - 1)
+
+    def strategy_choice(self, bid):
+        if self.strategy is None:
+            return None
+
+        # the table is only trained for two players
+        if sum(1 for count in self.cup.table.counts if count) != 2:
+            return None
+
+        opened = not bid.history or bid.history[0][1] is self
+        key = infoset_key(self.cup.hand, self.unknown_dices(), bid.rank, self.is_wild, opened)
+        entry = self.strategy.lookup(key)
+        if entry is None:
+            return None
+
+        first, second, weight = entry
+        return first if self.rng.random() * 255 < weight else second
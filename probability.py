@@ -0,0 +1,144 @@
+import math
+from array import array
+from functools import lru_cache
+
+REGULAR_ODDS = 1 / 6
+WILD_ODDS = 1 / 3
+
+# log(n!) for n = 0, 1, 2, ... grown on demand
+_log_factorials = [0.0]
+
+# precomputed tail rows, see tables.py
+_table = None
+
+
+def log_factorial(n):
+    """ returns log(n!) from the cached table """
+    while len(_log_factorials) <= n:
+        _log_factorials.append(_log_factorials[-1] + math.log(len(_log_factorials)))
+    return _log_factorials[n]
+
+
+def log_binomial(n, k):
+    """ returns log(n choose k) """
+    return log_factorial(n) - log_factorial(k) - log_factorial(n - k)
+
+
+def face_odds(face, is_wild):
+    """ the chance of a single unseen die counting towards the face """
+    if is_wild and face != 1:
+        return WILD_ODDS
+    return REGULAR_ODDS
+
+
+def matching_dices(histogram, face, is_wild):
+    """ counts the dice of a cup histogram that count towards the face """
+    if is_wild and face != 1:
+        return histogram[face] + histogram[1]
+    return histogram[face]
+
+
+# a row per number of unknown dice and odds, bounded for the large tables
+@lru_cache(maxsize=512)
+def binomial_pmf(n, p):
+    """ P(X = k) for k in 0..n where X ~ Binomial(n, p) """
+    log_p = math.log(p)
+    log_q = math.log(1 - p)
+    return tuple(math.exp(log_binomial(n, k) + k * log_p + (n - k) * log_q) for k in range(n + 1))
+
+
+@lru_cache(maxsize=512)
+def tail_probabilities(n, p):
+    """ P(X >= k) for k in 0..n + 1 where X ~ Binomial(n, p) """
+    tail = [0.0] * (n + 2)
+    # sum from the top so that small tails keep their precision
+    for k in range(n, -1, -1):
+        tail[k] = tail[k + 1] + binomial_pmf(n, p)[k]
+    tail[0] = 1.0
+    return tuple(min(value, 1.0) for value in tail)
+
+
+def install_table(table):
+    """ makes the engine read tail rows from a precomputed table, or compute them again with None """
+    global _table
+    _table = table
+
+
+def face_tail(unknown_dices, face, is_wild):
+    """ P(at least k of the unknown dice count towards the face) for k in 0..n + 1 """
+    if _table is not None:
+        tail = _table.tail(unknown_dices, is_wild and face != 1)
+        if tail is not None:
+            return tail
+    return tail_probabilities(unknown_dices, face_odds(face, is_wild))
+
+
+def bid_probability(quantity, face, unknown_dices, known_count, is_wild):
+    """
+    The exact probability that at least `quantity` dice count towards `face`.
+
+    Parameters:
+    - quantity (int): The bid count.
+    - face (int): The bid face.
+    - unknown_dices (int): The number of dice the player can't see.
+    - known_count (int): The dice in the player's own cup that already count towards the face.
+    - is_wild (bool): Flag indicating if 1's are wild.
+    """
+    needed = quantity - known_count
+    if needed <= 0:
+        return 1.0
+    if needed > unknown_dices:
+        return 0.0
+    return face_tail(unknown_dices, face, is_wild)[needed]
+
+
+def score_bids(combinations, histogram, unknown_dices, is_wild, tail_for=None):
+    """
+    Scores every (quantity, face) combination in one pass.
+
+    Each face needs a single tail table, after that every candidate is a lookup.
+    The tables come from the binomial engine unless tail_for(face) supplies them.
+
+    Returns:
+    - list: (probability, (quantity, face)) tuples in the order of the combinations.
+    """
+    faces = {}
+    result_probabilities = []
+    for com in combinations:
+        quantity, face = com
+        if face not in faces:
+            faces[face] = (matching_dices(histogram, face, is_wild),
+                           face_tail(unknown_dices, face, is_wild) if tail_for is None else tail_for(face))
+        known_count, tail = faces[face]
+
+        needed = quantity - known_count
+        if needed <= 0:
+            result = 1.0
+        elif needed > unknown_dices:
+            result = 0.0
+        else:
+            result = tail[needed]
+        result_probabilities.append((result, com))
+    return result_probabilities
+
+
+def odds_by_rank(histogram, total_dices, is_wild):
+    """
+    The probability of every bid of a round, indexed by the bid rank, in one pass.
+
+    The ranks of a face are consecutive counts, so each face is three runs: the counts the own
+    cup already covers are certain, the next ones read the tail of the unknown dice in order
+    and any count beyond the unknown dice is impossible.
+
+    Returns:
+    - array: 6 * total_dices probabilities, the same values as bid_probability.
+    """
+    unknown_dices = max(total_dices - sum(histogram), 0)
+    odds = array('d')
+    for face in range(1, 7):
+        known_count = min(matching_dices(histogram, face, is_wild), total_dices)
+        odds.extend([1.0] * known_count)
+        row = face_tail(unknown_dices, face, is_wild)[1:total_dices - known_count + 1]
+        odds.extend(row)
+        odds.extend([0.0] * (total_dices - known_count - len(row)))
+    return odds
@@ -0,0 +1,163 @@
+import time
+from abc import ABC, abstractmethod
+
+
+class Pacing:
+    """
+    A policy for how long to pause after each kind of game event.
+
+    Attributes:
+    - delays (dict): Seconds to wait after an event, by event name ('bid', 'reveal', 'result', 'round').
+    - scale (float): Multiplier applied to every delay, 0 turns pacing off.
+
+    Methods:
+    - pause(event): Waits for the delay configured for the event.
+    """
+    default_delays = {
+        'bid': 1,
+        'reveal': 1,
+        'result': 1,
+        'round': 2,
+    }
+
+    def __init__(self, scale=1.0, delays=None):
+        self.scale = scale
+        self.delays = dict(self.default_delays if delays is None else delays)
+
+    def pause(self, event):
+        delay = self.delays.get(event, 0) * self.scale
+        if delay > 0:
+            time.sleep(delay)
+
+
+class BaseRenderer(ABC):
+    """
+    The interface through which the game reports what happens at the table.
+
+    Methods:
+    - turn_started(player, bid): A player is about to decide on the current bid.
+    - bid_placed(player, bid, message): A player placed a bid.
+    - challenge(player, bid): A player called 'Liar!' on the current bid.
+    - reveal(players): All cups are lifted at the end of a round.
+    - round_won(player): A player won the challenge.
+    - die_lost(player): A player lost the challenge and one die.
+    - player_eliminated(player): A player has no dice left.
+    - round_ended(players): The round is over and all dice are about to be rolled again.
+    - winner(player): The game is over.
+    """
+
+    @abstractmethod
+    def turn_started(self, player, bid):
+        pass
+
+    @abstractmethod
+    def bid_placed(self, player, bid, message):
+        pass
+
+    @abstractmethod
+    def challenge(self, player, bid):
+        pass
+
+    @abstractmethod
+    def reveal(self, players):
+        pass
+
+    @abstractmethod
+    def round_won(self, player):
+        pass
+
+    @abstractmethod
+    def die_lost(self, player):
+        pass
+
+    @abstractmethod
+    def player_eliminated(self, player):
+        pass
+
+    @abstractmethod
+    def round_ended(self, players):
+        pass
+
+    @abstractmethod
+    def winner(self, player):
+        pass
+
+
+class NullRenderer(BaseRenderer):
+    """ A renderer that ignores every event, used for headless games. """
+
+    def turn_started(self, player, bid):
+        pass
+
+    def bid_placed(self, player, bid, message):
+        pass
+
+    def challenge(self, player, bid):
+        pass
+
+    def reveal(self, players):
+        pass
+
+    def round_won(self, player):
+        pass
+
+    def die_lost(self, player):
+        pass
+
+    def player_eliminated(self, player):
+        pass
+
+    def round_ended(self, players):
+        pass
+
+    def winner(self, player):
+        pass
+
+
+class ConsoleRenderer(BaseRenderer):
+    """
+    The pirate console output of the game.
+
+    Attributes:
+    - pacing (Pacing): How long to pause after events so a human can follow the table.
+    """
+
+    def __init__(self, pacing=None):
+        self.pacing = pacing or Pacing()
+
+    def turn_started(self, player, bid):
+        print(f"{bid}\n")
+
+    def bid_placed(self, player, bid, message):
+        print(message)
+        self.pacing.pause('bid')
+
+    def challenge(self, player, bid):
+        print(player.challenge())
+
+    def reveal(self, players):
+        for player in players:
+            print(f"Arrr, {player.name} be holdin' {player.cup.hand} in their hand!")
+        print()
+        self.pacing.pause('reveal')
+
+    def round_won(self, player):
+        print(f"Arrr, {player.name} won this round, ye lucky sea rat! Fortune be smilin' on ye today!")
+
+    def die_lost(self, player):
+        print(f"{player.name} lost this one, ye scurvy dog! Better luck next time, or ye’ll be walkin' the plank!")
+
+    def player_eliminated(self, player):
+        print(f"Arrr, {player.name} be out o' the game! The sea's a harsh mistress!")
+
+    def round_ended(self, players):
+        print()
+        self.pacing.pause('result')
+        # print how many dices players have
+        for player in players:
+            print(f"Avast! {player.name} be havin' {player.cup.number_of_dices} dice(s) in their cup!")
+        print()
+        self.pacing.pause('round')
+
+    def winner(self, player):
+        print(f"Hoist the colors! The winner be ---{player.name}---, the mightiest pirate o' them all!")
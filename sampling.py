@@ -0,0 +1,74 @@
+import math
+
+from items import FACES
+
+
+def wilson_interval(successes, trials, z=1.96):
+    """ the Wilson score interval of a success rate, (0, 1) before any trial """
+    if not trials:
+        return 0.0, 1.0
+    rate = successes / trials
+    z2 = z * z
+    centre = (rate + z2 / (2 * trials)) / (1 + z2 / trials)
+    spread = z * math.sqrt(rate * (1 - rate) / trials + z2 / (4 * trials * trials)) / (1 + z2 / trials)
+    return max(centre - spread, 0.0), min(centre + spread, 1.0)
+
+
+class FaceSampler:
+    """
+    Simulated rolls of the dice hidden from a player, shared by every bid the player weighs.
+
+    A roll is only kept as the number of dice matching each face, so one batch of rolls
+    answers any bid: a bid needing k more dice on a face holds in every roll with at least k.
+
+    Attributes:
+    - unknown_dices (int): The number of hidden dice rolled per sample.
+    - is_wild (bool): Flag indicating if 1's are wild.
+    - samples (int): The number of rolls so far.
+
+    Methods:
+    - draw(count): Rolls the hidden dice `count` more times.
+    - successes(face, needed): The number of rolls with at least `needed` dice matching the face.
+    """
+
+    def __init__(self, unknown_dices, is_wild, rng):
+        self.unknown_dices = unknown_dices
+        self.is_wild = is_wild
+        self.rng = rng
+        self.samples = 0
+        # face -> number of rolls by matching count
+        self._counts = {face: [0] * (unknown_dices + 1) for face in FACES}
+        # face -> rolls with at least k matching, rebuilt after every draw
+        self._tails = {}
+
+    def draw(self, count):
+        unknown_dices = self.unknown_dices
+        if not unknown_dices:
+            for face in FACES:
+                self._counts[face][0] += count
+        else:
+            # one bulk draw for the whole batch
+            dice = bytes(self.rng.choices(FACES, k=count * unknown_dices))
+            for start in range(0, len(dice), unknown_dices):
+                roll = dice[start:start + unknown_dices]
+                ones = roll.count(1) if self.is_wild else 0
+                for face in FACES:
+                    matching = roll.count(face)
+                    if face != 1:
+                        matching += ones
+                    self._counts[face][matching] += 1
+        self.samples += count
+        self._tails = {}
+
+    def successes(self, face, needed):
+        if needed <= 0:
+            return self.samples
+        if needed > self.unknown_dices:
+            return 0
+        tail = self._tails.get(face)
+        if tail is None:
+            tail = [0] * (self.unknown_dices + 2)
+            for k in range(self.unknown_dices, -1, -1):
+                tail[k] = tail[k + 1] + self._counts[face][k]
+            self._tails[face] = tail
+        return tail[needed]
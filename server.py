@@ -0,0 +1,472 @@
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cfr
+import tables
+from game import Game
+from players import BasePlayer, CFRComputerPlayer
+from renderers import BaseRenderer
+
+# the longest line a client may send, in bytes
+MAX_LINE = 64 * 1024
+
+
+def load_engine():
+    """ loads the precomputed tables and strategy in the current process """
+    tables.load()
+    CFRComputerPlayer.strategy = cfr.load()
+
+
+def decision_pool(workers=None):
+    """
+    The process pool computer players decide in.
+
+    Its workers are spawned rather than forked: a forked worker would inherit the open client
+    sockets and keep them alive after the server closes them.
+    """
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=load_engine)
+
+
+def choose_in_worker(player, bid):
+    """ runs in a pool process on copies of the player and the bid """
+    choice = player.choose(bid)
+    return choice, player.rng.getstate()
+
+
+class Connection:
+    """
+    A line-delimited JSON connection to a client.
+
+    Attributes:
+    - closed (bool): Flag indicating that the client went away.
+
+    Methods:
+    - send(message): Queues a message for the client.
+    - drain(): Waits until the queued messages are written.
+    - receive(): Waits for the next message, None once the client is gone.
+    """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.closed = False
+        self._reading = None
+
+    def send(self, message):
+        if not self.closed:
+            self.writer.write((json.dumps(message) + '\n').encode())
+
+    async def drain(self):
+        try:
+            await self.writer.drain()
+        except ConnectionError:
+            self.closed = True
+
+    async def receive(self):
+        # a read given up by one waiter carries on for the next one, so no line is lost or read twice
+        if self._reading is None:
+            self._reading = asyncio.ensure_future(self._read())
+        reading = self._reading
+        try:
+            return await asyncio.shield(reading)
+        finally:
+            if reading.done() and self._reading is reading:
+                self._reading = None
+
+    async def _read(self):
+        try:
+            line = await self.reader.readline()
+        except (ConnectionError, ValueError):
+            line = b''
+        if not line:
+            self.closed = True
+            return None
+        try:
+            message = json.loads(line)
+        except ValueError:
+            return {}
+        return message if isinstance(message, dict) else {}
+
+    def close(self):
+        self.closed = True
+        self.writer.close()
+
+
+class RemotePlayer(BasePlayer):
+    """
+    A human seat played over a network connection instead of the console.
+
+    If the client goes away, the seat keeps playing on its own: it calls 'Liar!' or opens with one 1.
+
+    Methods:
+    - decide_async(bid): Asks the client for a decision until it sends a valid one.
+    """
+
+    def __init__(self, name, number_of_dices, connection):
+        super().__init__(name, number_of_dices)
+        self.connection = connection
+
+    def __getstate__(self):
+        # computer players are copied to the pool with the bid history, which holds the remote seats
+        state = super().__getstate__()
+        state['connection'] = None
+        return state
+
+    def decide(self, bid):
+        raise RuntimeError("Remote players decide through the server")
+
+    def _error(self, message):
+        self.connection.send({'event': 'error', 'message': message})
+
+    async def decide_async(self, bid):
+        while not self.connection.closed:
+            self.connection.send(self.turn_message(bid))
+            await self.connection.drain()
+            reply = await self.connection.receive()
+            if reply is None:
+                break
+
+            if reply.get('liar'):
+                if bid.rank == bid.NO_BID:
+                    self._error("Arrr, there be no one to call a liar just yet! Ye best place yer bid, ye scallywag!")
+                    continue
+                return self.challenge()
+
+            try:
+                count, face = (int(value) for value in reply['bid'])
+            except (KeyError, TypeError, ValueError):
+                self._error("Ye need to place a proper bid, or ye’ll be feedin’ the fish!")
+                continue
+            result = self.place_bid(bid, count, face)
+            if result:
+                return result
+            self._error(bid.error)
+
+        # the client is gone
+        if bid.rank != bid.NO_BID:
+            return self.challenge()
+        return self.place_bid(bid, 1, 1)
+
+
+class TableRenderer(BaseRenderer):
+    """
+    Broadcasts the game events of a table to every connected client as JSON.
+
+    The game seed gives away every hidden hand, so it is only sent with the winner.
+    """
+
+    def __init__(self):
+        self.connections = []
+        self.seed = None
+
+    def broadcast(self, message):
+        for connection in self.connections:
+            connection.send(message)
+
+    def turn_started(self, player, bid):
+        self.broadcast({'event': 'turn', 'player': player.name, 'bid': bid.current_bid})
+
+    def bid_placed(self, player, bid, message):
+        self.broadcast({'event': 'bid', 'player': player.name, 'bid': bid.current_bid})
+
+    def challenge(self, player, bid):
+        self.broadcast({'event': 'challenge', 'player': player.name, 'bid': bid.current_bid})
+
+    def reveal(self, players):
+        self.broadcast({'event': 'reveal', 'hands': [[player.name, player.cup.hand] for player in players]})
+
+    def round_won(self, player):
+        self.broadcast({'event': 'round_won', 'player': player.name})
+
+    def die_lost(self, player):
+        self.broadcast({'event': 'die_lost', 'player': player.name})
+
+    def player_eliminated(self, player):
+        self.broadcast({'event': 'eliminated', 'player': player.name})
+
+    def round_ended(self, players):
+        self.broadcast({'event': 'round_ended',
+                        'dice': [[player.name, player.cup.number_of_dices] for player in players]})
+
+    def winner(self, player):
+        self.broadcast({'event': 'winner', 'player': player.name, 'seed': self.seed})
+
+
+class AsyncTable:
+    """
+    One game hosted by the server, started once all its human seats are taken.
+
+    Attributes:
+    - game (Game): The game played at the table.
+    - humans (int): The number of network seats, the other seats go to computer players.
+    - seats (list): The RemotePlayer of every joined client.
+    - finished (asyncio.Event): Set when the game is over.
+    - host (Task): The task playing the table, set by the server.
+
+    Methods:
+    - join(name, connection): Takes a human seat.
+    - leave(connection): Gives up the seat of a client that went away before the game started.
+    - play(): Waits for the humans and plays the game out, returns the winner.
+    """
+
+    def __init__(self, server, players, dices, humans=1, is_wild=False, seed=None):
+        self.server = server
+        self.players = players
+        self.dices = dices
+        self.humans = humans
+        self.is_wild = is_wild
+        self.renderer = TableRenderer()
+        self.game = Game(renderer=self.renderer, seed=seed)
+        self.renderer.seed = self.game.seed
+        self.seats = []
+        self.full = asyncio.Event()
+        self.finished = asyncio.Event()
+        self.host = None
+
+    def join(self, name, connection):
+        self.seats.append(RemotePlayer(name, self.dices, connection))
+        self.renderer.connections.append(connection)
+        if len(self.seats) == self.humans:
+            self.full.set()
+        return len(self.seats) - 1
+
+    def leave(self, connection):
+        self.seats = [seat for seat in self.seats if seat.connection is not connection]
+        self.renderer.connections.remove(connection)
+        return len(self.seats)
+
+    async def play(self):
+        await self.full.wait()
+        self.game.dices = self.dices
+        computers = self.game.generate_computer_player(self.players - self.humans)
+        self.game.seat_players(self.seats + computers, self.is_wild)
+        self.renderer.broadcast({'event': 'start', 'wild': self.is_wild,
+                                 'players': [player.name for player in self.game.players]})
+
+        bid = self.game.new_bid()
+        while True:
+            player = self.game.next_player(bid)
+            if player is None:
+                winner = self.game.players[0]
+                self.renderer.winner(winner)
+                return winner
+            self.game.resolve_turn(bid, player, await self.take_turn(player, bid))
+
+    async def take_turn(self, player, bid):
+        self.renderer.turn_started(player, bid)
+        if isinstance(player, RemotePlayer):
+            result = await player.decide_async(bid)
+        else:
+            result = await self.server.computer_decision(player, bid)
+        return player.finish_turn(bid, result)
+
+
+class GameServer:
+    """
+    An asyncio server hosting many tables of Liar's Dice over line-delimited JSON.
+
+    A client opens with {"name": ..., "table": ..., "players": 2-6, "dice": 2-5, "humans": 1, "wild": false}.
+    The first client naming a table sets it up, the others only need a name and the table; without
+    a table name every client gets a table of its own. The server then sends the game events and a
+    "your_turn" message whenever the client has to answer with {"bid": [count, face]} or {"liar": true}.
+    A client that goes away before its table is full gives up its seat, and an empty table is closed.
+    The seed of a game is only told with its winner, and clients may only choose it when the server
+    is started with client_seeds, e.g. for scripted demos and tests.
+
+    Computer decisions run in the executor, normally a process pool, so they never stall the event loop.
+
+    Attributes:
+    - tables (dict): The open tables by name.
+    - executor (Executor): Where computer players decide, None to decide on the event loop.
+    - client_seeds (bool): Flag allowing the first client of a table to choose its seed.
+
+    Methods:
+    - computer_decision(player, bid): Lets a computer player decide in the executor.
+    - handle(reader, writer): Serves one client connection.
+    - start(host, port): Starts listening.
+    """
+
+    def __init__(self, executor=None, client_seeds=False):
+        self.tables = {}
+        self.executor = executor
+        self.client_seeds = client_seeds
+        self._table_ids = itertools.count(1)
+
+    async def computer_decision(self, player, bid):
+        if self.executor is None:
+            return player.decide(bid)
+        loop = asyncio.get_running_loop()
+        choice, rng_state = await loop.run_in_executor(self.executor, choose_in_worker, player, bid)
+        # keep the player's random stream where the worker left it, so the game stays replayable
+        player.rng.setstate(rng_state)
+        return player.apply_choice(bid, choice)
+
+    def _open_table(self, hello):
+        try:
+            players = int(hello.get('players', 2))
+            dices = int(hello.get('dice', 5))
+            humans = int(hello.get('humans', 1))
+            seed = hello.get('seed')
+            seed = None if seed is None else int(seed)
+        except (TypeError, ValueError):
+            raise ValueError("Arrr, the table settings be numbers, matey!")
+        if seed is not None and not self.client_seeds:
+            raise ValueError("Arrr, the house rolls the dice here, keep yer seed to yerself!")
+        is_wild = hello.get('wild', False)
+        if not isinstance(is_wild, bool):
+            raise ValueError("Arrr, wild be true or false, nothin' else!")
+        if players not in range(2, 7) or dices not in range(2, 6):
+            raise ValueError("Ye best set 2 - 6 players with 2 - 5 dice each!")
+        if humans not in range(1, players + 1) or players - humans > len(Game.available_computer_players_names):
+            raise ValueError("There be not enough seats or pirates for that many landlubbers!")
+        return AsyncTable(self, players, dices, humans, is_wild, seed)
+
+    def _close_table(self, name, table):
+        if self.tables.get(name) is table:
+            del self.tables[name]
+        table.finished.set()
+
+    async def _host(self, name, table):
+        try:
+            await table.play()
+        finally:
+            self._close_table(name, table)
+
+    async def _wait_for_start(self, table, connection):
+        """ waits until the table is full, returns False if the client went away before """
+        full = asyncio.ensure_future(table.full.wait())
+        try:
+            while not table.full.is_set():
+                # nothing is expected from the client before the game starts, only whether it is gone
+                receive = asyncio.ensure_future(connection.receive())
+                await asyncio.wait((full, receive), return_when=asyncio.FIRST_COMPLETED)
+                if not receive.done():
+                    receive.cancel()
+                elif receive.result() is None:
+                    return False
+            return True
+        finally:
+            full.cancel()
+
+    async def handle(self, reader, writer):
+        connection = Connection(reader, writer)
+        hello = await connection.receive()
+        if not hello or not isinstance(hello.get('name'), str):
+            connection.send({'event': 'error', 'message': "Arrr, tell us yer name, ye salty sea dog!"})
+            connection.close()
+            return
+
+        name = hello.get('table') or f"table-{next(self._table_ids)}"
+        table = self.tables.get(name)
+        if table is None:
+            try:
+                table = self.tables[name] = self._open_table(hello)
+            except ValueError as error:
+                connection.send({'event': 'error', 'message': str(error)})
+                connection.close()
+                return
+            table.host = asyncio.create_task(self._host(name, table))
+        elif table.full.is_set():
+            connection.send({'event': 'error', 'message': "That table be full, find yerself another!"})
+            connection.close()
+            return
+
+        seat = table.join(hello['name'], connection)
+        connection.send({'event': 'joined', 'table': name, 'seat': seat})
+        if not await self._wait_for_start(table, connection):
+            # nobody is left waiting at the table, so the game is never played
+            if not table.leave(connection):
+                table.host.cancel()
+                self._close_table(name, table)
+            connection.close()
+            return
+        await table.finished.wait()
+        await connection.drain()
+        connection.close()
+
+    async def start(self, host='127.0.0.1', port=8765):
+        return await asyncio.start_server(self.handle, host, port, limit=MAX_LINE)
+
+
+def cautious_strategy(message):
+    """ a scripted client: raises the count of the current face while it's below a third of the dice """
+    bid = message['bid']
+    if bid is None:
+        return {'bid': [1, message['hand'][0]]}
+    if (bid['count'] + 1) * 3 > message['total_dices']:
+        return {'liar': True}
+    return {'bid': [bid['count'] + 1, bid['face']]}
+
+
+async def run_client(host, port, name, strategy=cautious_strategy, **table):
+    """
+    A scripted local client, plays one game and returns the name of the winner.
+
+    Parameters:
+    - strategy (callable): Turns a "your_turn" message into the reply.
+    - table: The table settings sent with the name (table, players, dice, humans, wild, seed).
+    """
+    reader, writer = await asyncio.open_connection(host, port, limit=MAX_LINE)
+    connection = Connection(reader, writer)
+    connection.send({'name': name, **table})
+    winner = None
+    while True:
+        message = await connection.receive()
+        if message is None:
+            break
+        if message.get('event') == 'your_turn':
+            connection.send(strategy(message))
+        elif message.get('event') == 'winner':
+            winner = message['player']
+    connection.close()
+    return winner
+
+
+async def demo(clients, workers, **table):
+    """ starts a server and plays one game per scripted client against it """
+    with decision_pool(workers) as pool:
+        game_server = GameServer(pool, client_seeds=True)
+        server = await game_server.start(port=0)
+        host, port = server.sockets[0].getsockname()[:2]
+        start = time.perf_counter()
+        async with server:
+            winners = await asyncio.gather(*(run_client(host, port, f"Scripted {i}", **table)
+                                             for i in range(clients)))
+        elapsed = time.perf_counter() - start
+    humans_won = sum(1 for winner in winners if winner and winner.startswith('Scripted'))
+    print(f"{clients} tables in {elapsed:.2f}s, the scripted clients won {humans_won}")
+
+
+async def serve(host, port, workers):
+    with decision_pool(workers) as pool:
+        server = await GameServer(pool).start(host, port)
+        print(f"Liar's Dice server listening on {host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host many tables of Liar's Dice over TCP.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--demo', type=int, metavar='CLIENTS',
+                        help="play against a local server with this many scripted clients, then exit")
+    parser.add_argument('--players', type=int, default=4)
+    args = parser.parse_args()
+
+    load_engine()
+    if args.demo:
+        asyncio.run(demo(args.demo, args.workers, players=args.players))
+    else:
+        asyncio.run(serve(args.host, args.port, args.workers))
+
+
+if __name__ == '__main__':
+    main()
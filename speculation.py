@@ -0,0 +1,63 @@
+import threading
+
+from players import ComputerPlayer
+from probability import odds_by_rank
+
+
+def speculable(player):
+    """ computer players whose odds only depend on the hand and are looked up in the decision cache """
+    return isinstance(player, ComputerPlayer) and player.cache is not None and player.frontier is None
+
+
+class Speculator:
+    """
+    Works out the odds of the computer players' next decisions in a background thread while a human thinks.
+
+    The odds a computer player decides by only depend on its own hand, the dice in play and the wild
+    flag, not on the bid it faces, so they are the same whatever the human bids. The worker stores
+    them in the players' decision cache in turn order, where the next decisions look them up.
+
+    A human's turn works nothing out, and the worker is stopped and joined before the game goes
+    on, so the cache and the odds helpers are never used by two threads at once. If the human
+    called 'Liar!', the dice are rolled again and the odds of the old hands are never asked for;
+    the cache drops them in time. The worker doesn't draw from any random stream, so seeded games
+    play out the same with it.
+
+    Attributes:
+    - prepared (int): The number of situations worked out ahead of a decision.
+
+    Methods:
+    - start(players, bid): Starts working out the odds of the players after the first one.
+    - stop(): Stops the worker and waits for it.
+    """
+
+    def __init__(self):
+        self.prepared = 0
+        self._thread = None
+        self._stopping = threading.Event()
+
+    def start(self, players, bid):
+        self.stop()
+        upcoming = [player for player in list(players)[1:] if speculable(player)]
+        if not upcoming:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._work, args=(upcoming, bid), daemon=True)
+        self._thread.start()
+
+    def _work(self, players, bid):
+        for player in players:
+            if self._stopping.is_set():
+                return
+            # stored without a lookup, so the cache counts the player's own lookup as the only one
+            key = player.odds_key(bid)
+            if key not in player.cache:
+                player.cache.put(key, odds_by_rank(*key))
+                self.prepared += 1
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join()
+        self._thread = None
@@ -0,0 +1,120 @@
+import json
+import time
+from bisect import bisect_left
+
+LATENCY_BUCKETS = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0)
+COUNT_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 10000, 100000)
+
+
+class Histogram:
+    """
+    Counts observations in fixed buckets, like a Prometheus histogram.
+
+    Attributes:
+    - buckets (tuple): The upper bound of every bucket, an implicit +Inf bucket follows.
+    - counts (list): The number of observations in each bucket, not cumulative.
+    - sum (float): The sum of all observations.
+    - count (int): The number of observations.
+
+    Methods:
+    - observe(value): Adds an observation.
+    - merge(other): Adds the observations of a histogram with the same buckets.
+    - as_dict(): Returns the histogram as plain data.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.sum += other.sum
+        self.count += other.count
+
+    def as_dict(self):
+        return {
+            'buckets': list(self.buckets),
+            'counts': self.counts,
+            'sum': self.sum,
+            'count': self.count,
+            'mean': self.sum / self.count if self.count else None,
+        }
+
+
+class GameStats:
+    """
+    Opt-in statistics of the game hot paths.
+
+    A game only records anything when it is given a GameStats; without one every hook is a
+    single `is None` check. One instance may be shared by many games to aggregate them.
+
+    Attributes:
+    - decide_latency (Histogram): Seconds per ComputerPlayer.decide call.
+    - simulations (Histogram): Simulated rolls per computer decision.
+    - candidates (Histogram): Valid raises from generate_combinations per scored decision.
+    - rounds (Histogram): Rounds per finished game.
+    - end_turn_latency (Histogram): Seconds spent in Game.end_turn.
+
+    Methods:
+    - time_decision(player, bid): Runs player.decide(bid) and records it if the player is a computer.
+    - merge(other): Adds the statistics of another GameStats.
+    - as_dict(), to_json(): Export the statistics.
+    - to_prometheus(prefix): Exports the statistics in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self.decide_latency = Histogram(LATENCY_BUCKETS)
+        self.simulations = Histogram(COUNT_BUCKETS)
+        self.candidates = Histogram(COUNT_BUCKETS)
+        self.rounds = Histogram(COUNT_BUCKETS)
+        self.end_turn_latency = Histogram(LATENCY_BUCKETS)
+
+    def _histograms(self):
+        return {
+            'decide_latency_seconds': self.decide_latency,
+            'simulations_per_decision': self.simulations,
+            'candidates_per_decision': self.candidates,
+            'rounds_per_game': self.rounds,
+            'end_turn_latency_seconds': self.end_turn_latency,
+        }
+
+    def time_decision(self, player, bid):
+        if not getattr(player, 'is_computer', False):
+            return player.decide(bid)
+
+        player.simulations = 0
+        start = time.perf_counter()
+        result = player.decide(bid)
+        self.decide_latency.observe(time.perf_counter() - start)
+        self.simulations.observe(player.simulations)
+        return result
+
+    def merge(self, other):
+        for name, histogram in self._histograms().items():
+            histogram.merge(other._histograms()[name])
+
+    def as_dict(self):
+        return {name: histogram.as_dict() for name, histogram in self._histograms().items()}
+
+    def to_json(self):
+        return json.dumps(self.as_dict(), indent=2)
+
+    def to_prometheus(self, prefix='liars_dice'):
+        lines = []
+        for name, histogram in self._histograms().items():
+            metric = f"{prefix}_{name}"
+            lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+            lines.append(f"{metric}_sum {histogram.sum}")
+            lines.append(f"{metric}_count {histogram.count}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,31 @@
+import random
+
+
+def new_seed():
+    """ a fresh 64-bit seed from the operating system """
+    return random.SystemRandom().getrandbits(64)
+
+
+class Streams:
+    """
+    A family of independent random generators derived from a single seed.
+
+    Every stream is seeded from the game seed and its own name, so a game replays
+    bit-for-bit from its seed and one stream drawing more numbers never shifts another.
+
+    Attributes:
+    - seed (int): The seed every stream is derived from.
+
+    Methods:
+    - stream(name): Returns the generator for the named stream, creating it on first use.
+    """
+
+    def __init__(self, seed=None):
+        self.seed = new_seed() if seed is None else seed
+        self._streams = {}
+
+    def stream(self, name):
+        if name not in self._streams:
+            # string seeds are hashed with sha512, so they don't depend on PYTHONHASHSEED
+            self._streams[name] = random.Random(f"{self.seed}/{name}")
+        return self._streams[name]
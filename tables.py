@@ -0,0 +1,86 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+import probability
+from probability import REGULAR_ODDS, WILD_ODDS, tail_probabilities
+
+MAGIC = b'LDBT'
+# magic, byte order, max unknown dice, padding to keep the values 8-byte aligned
+HEADER = struct.Struct('<4scH')
+HEADER_SIZE = 8
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bid_tables.bin')
+
+# 6 players with 5 dice each, as allowed by Game.set_players_count and Game.set_dice_count
+MAX_DICES = 6 * 5
+
+
+class BidTable:
+    """
+    A read-only, memory-mapped table of bid probabilities.
+
+    The probability that a bid holds only depends on the odds of a single die (regular or wild),
+    the number of dice the player can't see and how many more matching dice are needed, so
+    the table holds a row of tail probabilities for every (odds, unknown dice) pair.
+    Processes that map the same file share one page-cached copy.
+
+    Attributes:
+    - max_dices (int): The largest number of unknown dice in the table.
+
+    Methods:
+    - tail(unknown_dices, is_wild_face): Returns the row of P(at least k matching) for k in 0..n + 1.
+    - close(): Releases the mapping.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        with open(path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, byte_order, self.max_dices = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a bid probability table")
+        if byte_order.decode() != sys.byteorder[0]:
+            raise ValueError(f"{path} was built on a machine with a different byte order")
+
+        self._width = self.max_dices + 2
+        self._values = memoryview(self._mmap)[HEADER_SIZE:].cast('d')
+
+    def tail(self, unknown_dices, is_wild_face):
+        if unknown_dices > self.max_dices:
+            return None
+        start = (int(is_wild_face) * (self.max_dices + 1) + unknown_dices) * self._width
+        return self._values[start:start + self._width]
+
+    def close(self):
+        self._values.release()
+        self._mmap.close()
+
+
+def build(path=DEFAULT_PATH, max_dices=MAX_DICES):
+    """ precomputes every tail row up to max_dices unknown dice and writes them to path """
+    width = max_dices + 2
+    values = array('d')
+    for odds in (REGULAR_ODDS, WILD_ODDS):
+        for unknown_dices in range(max_dices + 1):
+            row = list(tail_probabilities(unknown_dices, odds))
+            values.extend(row + [0.0] * (width - len(row)))
+
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, sys.byteorder[0].encode(), max_dices).ljust(HEADER_SIZE, b'\0'))
+        values.tofile(file)
+    return path
+
+
+def load(path=DEFAULT_PATH):
+    """ maps the table at path and installs it in the probability engine, if the file exists """
+    if not os.path.exists(path):
+        return None
+    table = BidTable(path)
+    probability.install_table(table)
+    return table
+
+
+if __name__ == '__main__':
+    print(f"Bid tables written to {build(*sys.argv[1:2])}")
@@ -0,0 +1,50 @@
+import random
+
+from batch import choose_many, run_games
+from game import Game
+from gamelog import GameLog
+from players import BayesianComputerPlayer, ComputerPlayer
+from renderers import NullRenderer
+
+
+def seeded_game(seed):
+    """ a logged computer-only game of 2 - 6 players drawn from the seed, one of them Bayesian now and then """
+    rng = random.Random(seed)
+    profiles = rng.sample(list(ComputerPlayer.gambler), rng.randint(2, 5))
+    dices = rng.randint(2, 5)
+    players = [ComputerPlayer(profile, dices) for profile in profiles]
+    if rng.random() < 0.2:
+        players[0] = BayesianComputerPlayer(profiles[0], dices)
+    game = Game(renderer=NullRenderer(), seed=seed, log=GameLog())
+    game.seat_players(players, rng.random() < 0.5)
+    return game
+
+
+def test_run_games_plays_like_game_run():
+    seeds = range(200)
+    alone = [seeded_game(seed) for seed in seeds]
+    winners = [game.run() for game in alone]
+    batched = [seeded_game(seed) for seed in seeds]
+    batch_winners = run_games(batched)
+
+    for game, batch_game, winner, batch_winner in zip(alone, batched, winners, batch_winners):
+        assert batch_winner.name == winner.name
+        assert batch_game.turn == game.turn
+        # the same rounds with the same bids, hands and losers
+        assert batch_game.log.getvalue() == game.log.getvalue()
+
+
+def test_choose_many_chooses_like_choose():
+    games = [seeded_game(seed) for seed in range(50)]
+    decisions = []
+    for game in games:
+        bid = game.new_bid()
+        player = game.next_player(bid)
+        bid.place_bid(1, 2, player)
+        decisions.append((game.next_player(bid), bid))
+
+    states = [player.rng.getstate() for player, _ in decisions]
+    batch_choices = choose_many(decisions)
+    for (player, bid), state in zip(decisions, states):
+        player.rng.setstate(state)
+    assert batch_choices == [player.choose(bid) for player, bid in decisions]
@@ -0,0 +1,85 @@
+import os
+import sys
+
+import pytest
+
+from bots import BotError, BotPlayer, BotPool, BotWorker
+from game import Game
+from players import ComputerPlayer
+from renderers import NullRenderer
+
+ECHO_BOT = """
+import json, os, sys, time
+for line in sys.stdin:
+    message = json.loads(line)
+    if message.get('sleep'):
+        time.sleep(message['sleep'])
+    if message.get('exit'):
+        sys.exit(3)
+    print(json.dumps({'echo': message, 'pid': os.getpid()}), flush=True)
+"""
+
+EXAMPLE_BOT = [sys.executable, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'bots.py')]
+
+
+@pytest.fixture
+def echo_bot(tmp_path):
+    path = tmp_path / 'echo_bot.py'
+    path.write_text(ECHO_BOT)
+    return [sys.executable, str(path)]
+
+
+def test_worker_is_restarted_after_a_timeout(echo_bot):
+    worker = BotWorker(echo_bot)
+    try:
+        first = worker.ask({'n': 1}, timeout=5)
+        assert first['echo'] == {'n': 1}
+        with pytest.raises(BotError):
+            worker.ask({'sleep': 2}, timeout=0.2)
+        assert worker.process is None
+
+        # the late answer of the killed bot is never taken for the next one
+        second = worker.ask({'n': 2}, timeout=5)
+        assert second['echo'] == {'n': 2} and second['pid'] != first['pid']
+        assert worker.starts == 2
+    finally:
+        worker.stop()
+
+
+def test_worker_is_restarted_after_a_crash(echo_bot):
+    worker = BotWorker(echo_bot)
+    try:
+        with pytest.raises(BotError):
+            worker.ask({'exit': True}, timeout=5)
+        assert worker.ask({'n': 1}, timeout=5)['echo'] == {'n': 1}
+        assert worker.starts == 2
+    finally:
+        worker.stop()
+
+
+def test_pool_keeps_its_workers_across_calls(echo_bot):
+    with BotPool(echo_bot, size=2, timeout=5) as pool:
+        pids = {pool.ask({'n': n})['pid'] for n in range(10)}
+        with pytest.raises(BotError):
+            pool.ask({'sleep': 2}, timeout=0.2)
+        pool.ask({'n': 10})
+        assert len(pids) == 1
+        assert pool.as_dict() == {'workers': 1, 'calls': 12, 'restarts': 1}
+
+
+def test_bot_gets_the_turn_message_and_plays_a_game():
+    bot = BotPlayer("The Outsider", 2, EXAMPLE_BOT, timeout=10)
+    game = Game(renderer=NullRenderer(), seed=3)
+    game.seat_players([bot, ComputerPlayer("Ironhook Steady", 2)], True)
+    winner = game.run()
+    assert winner.name in ("The Outsider", "Ironhook Steady")
+    assert bot.failures == 0
+
+
+def test_bot_failing_to_answer_falls_back(echo_bot):
+    # the echo bot never answers with a move
+    bot = BotPlayer("The Outsider", 2, echo_bot, timeout=10)
+    game = Game(renderer=NullRenderer(), seed=3)
+    game.seat_players([bot, ComputerPlayer("Ironhook Steady", 2)])
+    game.run()
+    assert bot.failures > 0
@@ -0,0 +1,24 @@
+from equivalence import ENGINES, estimate, games_verdict, seat, situation, surprising, verdict
+
+
+def report(low, high, games=1000):
+    return {'games': games, 'win_rate_difference': (low, high), 'outside_rate': 0.0, 'expected_outside_rate': 0.0,
+            'action_agreement': 1.0}
+
+
+def test_games_pass_only_within_the_margin():
+    assert games_verdict(report(-0.02, 0.01)) == 'equivalent'
+    # a wide interval around 0 shows no difference, but no equivalence either
+    assert games_verdict(report(-0.17, 0.11)) == 'inconclusive'
+    assert games_verdict(report(0.04, 0.09)) == 'different'
+    assert games_verdict(report(0.0, 0.0, games=0)) is None
+    assert verdict(report(-0.17, 0.11)) == []
+    assert verdict(report(0.04, 0.09)) == ['games']
+
+
+def test_simulation_reference_agrees_with_the_exact_engine():
+    case = situation(5)
+    exact, exact_samples = estimate(*seat('exact', case))
+    simulated, samples = estimate(*seat('simulation', case))
+    assert exact_samples is None and samples == ENGINES['simulation'].samples
+    assert not any(surprising(round(b * samples), samples, a, 1e-4) for a, b in zip(exact, simulated))
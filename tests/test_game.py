@@ -0,0 +1,45 @@
+from game import Game
+from gamelog import GameLog, GameLogReader
+from players import ComputerPlayer, HumanPlayer
+from renderers import NullRenderer
+
+
+def test_few_seats_with_many_dice_make_a_large_table():
+    game = Game(renderer=NullRenderer(), seed=1)
+    game.seat_large_table(4, 30)
+    assert len(game.players) == 4
+    assert all(player.frontier == Game.large_table_frontier for player in game.players)
+
+
+def test_large_table_signs_on_numbered_crews():
+    game = Game(renderer=NullRenderer(), seed=1)
+    game.seat_large_table(12, 3, human_name="Stan")
+    humans = [player for player in game.players if isinstance(player, HumanPlayer)]
+    crews = [player for player in game.players if isinstance(player, ComputerPlayer)]
+    assert [player.name for player in humans] == ["Stan"] and len(crews) == 11
+    assert all(player.frontier == Game.large_table_frontier for player in crews)
+    assert all(player.name.rsplit(' #', 1)[0] in ComputerPlayer.gambler for player in crews)
+    assert len({player.name for player in crews}) == 11
+
+
+def test_regular_tables_weigh_every_raise():
+    game = Game(renderer=NullRenderer(), seed=1)
+    game.dices = 5
+    assert all(player.frontier is None for player in game.generate_computer_player(5))
+
+
+def test_large_table_replays_from_the_log(tmp_path):
+    path = str(tmp_path / 'large.ldgl')
+    with GameLog(path) as log:
+        game = Game(renderer=NullRenderer(), seed=99, log=log)
+        game.seat_large_table(12, 8, is_wild=True)
+        game.run()
+        # more seats than fit in a byte
+        Game(renderer=NullRenderer(), seed=100, log=log).seat_large_table(300, 2)
+
+    with GameLogReader(path) as reader:
+        record, crowded = reader.games()
+        assert len(crowded.seats) == 300
+        assert all(seat.frontier == Game.large_table_frontier for seat in record.seats)
+        _, replayed = reader.replay(record)
+        assert replayed == list(reader.rounds(record))
@@ -0,0 +1,79 @@
+import pytest
+
+from game import Game
+from gamelog import GameLog, GameLogReader, GameRecord, RoundRecord
+from players import BayesianComputerPlayer, ComputerPlayer
+from renderers import NullRenderer
+
+
+def play_logged_game(log, seed=42):
+    game = Game(renderer=NullRenderer(), seed=seed, log=log)
+    players = [ComputerPlayer(name, 3) for name in list(ComputerPlayer.gambler)[:2]]
+    # settings that aren't the profile's own must be logged to replay
+    players.append(BayesianComputerPlayer("Ironhook Steady", 3, gambler_threshold=0.65))
+    players[0].opening_count, players[0].opening_face = 2, 5
+    game.seat_players(players, True)
+    game.run()
+
+
+def test_log_round_trip(tmp_path):
+    path = str(tmp_path / 'rounds.ldgl')
+    with GameLog(path) as log:
+        play_logged_game(log)
+
+    with GameLogReader(path) as reader:
+        records = list(reader.records())
+        (game,) = reader.games()
+        assert records[0] == game and isinstance(game, GameRecord)
+        assert all(isinstance(record, RoundRecord) for record in records[1:])
+        assert (game.seed, game.is_wild, game.cfr_strategy) == (42, True, False)
+        assert [(seat.player, seat.threshold, seat.opening_count, seat.opening_face) for seat in game.seats] == [
+            ('ComputerPlayer', 0.5, 2, 5), ('ComputerPlayer', 0.45, 3, 3), ('BayesianComputerPlayer', 0.65, 3, 3)]
+
+        rounds = list(reader.rounds(game))
+        assert rounds == records[1:]
+        assert [round.round for round in rounds] == list(range(len(rounds)))
+        # the loser of every round has one die less in the next one
+        for played, following in zip(rounds, rounds[1:]):
+            assert len(following.hands[played.loser]) == len(played.hands[played.loser]) - 1
+            assert sum(map(len, following.hands)) == sum(map(len, played.hands)) - 1
+
+
+def test_replay_matches_the_log(tmp_path):
+    path = str(tmp_path / 'rounds.ldgl')
+    with GameLog(path) as log:
+        play_logged_game(log)
+
+    with GameLogReader(path) as reader:
+        (record,) = reader.games()
+        winner, replayed = reader.replay(record)
+        assert replayed == list(reader.rounds(record))
+        assert winner.name in [seat.name for seat in record.seats]
+
+
+def test_a_seed_logged_twice_replays_each_game(tmp_path):
+    path = str(tmp_path / 'rounds.ldgl')
+    # two runs into the same file, the second one through an in-memory log copied over
+    with GameLog(path) as log:
+        play_logged_game(log)
+        play_logged_game(log, seed=7)
+    copy = GameLog()
+    play_logged_game(copy)
+    with GameLog(path) as log:
+        log.extend(copy.getvalue())
+
+    with GameLogReader(path) as reader:
+        first, second = reader.games(42)
+        assert first.offset != second.offset
+        assert list(reader.rounds(first)) == list(reader.rounds(second))
+        for record in (first, second):
+            _, replayed = reader.replay(record)
+            assert replayed == list(reader.rounds(record))
+
+
+def test_appending_to_another_version_is_refused(tmp_path):
+    path = tmp_path / 'old.ldgl'
+    path.write_bytes(b'LDGL\x01\x00')
+    with pytest.raises(ValueError):
+        GameLog(str(path))
+    assert path.read_bytes() == b'LDGL\x01\x00'
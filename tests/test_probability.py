@@ -0,0 +1,50 @@
+import itertools
+
+import pytest
+
+import probability
+from probability import bid_probability, matching_dices, odds_by_rank
+
+
+@pytest.fixture(autouse=True)
+def computed_tails():
+    # compare against the computed rows, not a table another test may have installed
+    table = probability._table
+    probability.install_table(None)
+    yield
+    probability.install_table(table)
+
+
+def enumerated_probability(quantity, face, unknown_dices, known_count, is_wild):
+    """ the share of every roll of the unknown dice for which the bid holds """
+    hits = 0
+    rolls = list(itertools.product(range(1, 7), repeat=unknown_dices))
+    for roll in rolls:
+        histogram = [0] + [roll.count(value) for value in range(1, 7)]
+        hits += known_count + matching_dices(histogram, face, is_wild) >= quantity
+    return hits / len(rolls)
+
+
+@pytest.mark.parametrize('is_wild', [False, True])
+@pytest.mark.parametrize('unknown_dices', [0, 1, 2, 4])
+def test_bid_probability_matches_enumeration(unknown_dices, is_wild):
+    for face in range(1, 7):
+        for known_count in range(3):
+            for quantity in range(1, unknown_dices + known_count + 2):
+                expected = enumerated_probability(quantity, face, unknown_dices, known_count, is_wild)
+                actual = bid_probability(quantity, face, unknown_dices, known_count, is_wild)
+                assert actual == pytest.approx(expected, abs=1e-12)
+
+
+@pytest.mark.parametrize('is_wild', [False, True])
+def test_odds_by_rank_matches_bid_probability(is_wild):
+    histogram = [0, 1, 0, 2, 0, 0, 0]
+    total_dices = 7
+    odds = odds_by_rank(histogram, total_dices, is_wild)
+    assert len(odds) == 6 * total_dices
+    for face in range(1, 7):
+        known_count = matching_dices(histogram, face, is_wild)
+        for quantity in range(1, total_dices + 1):
+            rank = (face - 1) * total_dices + quantity - 1
+            expected = bid_probability(quantity, face, total_dices - 3, known_count, is_wild)
+            assert odds[rank] == pytest.approx(expected, abs=1e-12)
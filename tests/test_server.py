@@ -0,0 +1,93 @@
+import asyncio
+
+from server import Connection, GameServer, run_client
+
+
+def with_server(scenario, **options):
+    """ runs scenario(server, host, port) against a server deciding on the event loop """
+    async def main():
+        game_server = GameServer(**options)
+        server = await game_server.start(port=0)
+        host, port = server.sockets[0].getsockname()[:2]
+        async with server:
+            return await scenario(game_server, host, port)
+    return asyncio.run(asyncio.wait_for(main(), 60))
+
+
+async def connect(host, port, hello):
+    reader, writer = await asyncio.open_connection(host, port)
+    connection = Connection(reader, writer)
+    connection.send(hello)
+    return connection
+
+
+async def play_out(connection):
+    """ answers every turn cautiously and returns the events the client got """
+    events = []
+    while True:
+        message = await connection.receive()
+        if message is None:
+            return events
+        events.append(message)
+        if message.get('event') == 'your_turn':
+            connection.send({'liar': True} if message['bid'] else {'bid': [1, message['hand'][0]]})
+
+
+def test_scripted_clients_play_their_games():
+    async def scenario(game_server, host, port):
+        return await asyncio.gather(*(run_client(host, port, f"Scripted {i}", players=3, dice=2) for i in range(4)))
+
+    winners = with_server(scenario)
+    assert len(winners) == 4 and all(winners)
+
+
+def test_shared_table_keeps_the_seed_until_the_winner():
+    async def scenario(game_server, host, port):
+        first = await connect(host, port, {'name': 'Anne', 'table': 'cove', 'players': 3, 'dice': 2, 'humans': 2,
+                                           'wild': True})
+        second = await connect(host, port, {'name': 'Mary', 'table': 'cove'})
+        return await asyncio.gather(play_out(first), play_out(second))
+
+    for events in with_server(scenario):
+        start = next(event for event in events if event['event'] == 'start')
+        assert 'seed' not in start and start['wild'] is True
+        assert all(event['wild'] is True for event in events if event['event'] == 'your_turn')
+        assert isinstance(events[-1]['seed'], int) and events[-1]['event'] == 'winner'
+
+
+def test_client_seeds_and_bad_settings_are_refused():
+    async def scenario(game_server, host, port):
+        replies = []
+        for hello in ({'name': 'Anne', 'seed': 42}, {'name': 'Anne', 'wild': 'false'}, {'name': 'Anne', 'dice': 9}):
+            connection = await connect(host, port, hello)
+            replies.append(await connection.receive())
+            connection.close()
+        return replies
+
+    assert [reply['event'] for reply in with_server(scenario)] == ['error'] * 3
+
+
+def test_client_seed_replays_in_test_mode():
+    async def scenario(game_server, host, port):
+        games = []
+        for _ in range(2):
+            connection = await connect(host, port, {'name': 'Anne', 'players': 2, 'dice': 2, 'seed': 42})
+            games.append(await play_out(connection))
+        return games
+
+    first, second = with_server(scenario, client_seeds=True)
+    # the same seed deals the same game, only the table names differ
+    assert first[1:] == second[1:] and first[-1]['seed'] == 42
+
+
+def test_table_left_before_it_fills_is_closed():
+    async def scenario(game_server, host, port):
+        connection = await connect(host, port, {'name': 'Anne', 'table': 'cove', 'players': 3, 'humans': 2})
+        assert (await connection.receive())['event'] == 'joined'
+        table = game_server.tables['cove']
+        connection.close()
+        await asyncio.wait_for(table.finished.wait(), 5)
+        return game_server.tables, table.host.cancelled()
+
+    tables, cancelled = with_server(scenario)
+    assert tables == {} and cancelled
@@ -0,0 +1,60 @@
+import itertools
+
+import pytest
+
+from cache import decision_cache
+from game import Game
+from gamelog import GameLog
+from players import ComputerPlayer, HumanPlayer
+from renderers import NullRenderer
+from speculation import Speculator
+
+
+@pytest.fixture
+def scripted_human(monkeypatch):
+    # bids one 1 when it can't call, calls 'Liar!' otherwise, whatever the timing of the worker
+    answers = itertools.cycle(['2', '1', '1', '1'])
+    monkeypatch.setattr('builtins.input', lambda prompt='': next(answers))
+    monkeypatch.setattr('builtins.print', lambda *args, **kwargs: None)
+
+
+def play(seed, speculate):
+    decision_cache.clear()
+    game = Game(renderer=NullRenderer(), seed=seed, log=GameLog(), speculate=speculate)
+    players = [HumanPlayer("Stan", 3)] + [ComputerPlayer(name, 3) for name in ComputerPlayer.gambler]
+    game.seat_players(players, seed % 2 == 0)
+    winner = game.run()
+    return winner.name, game.log.getvalue(), game.speculator
+
+
+def test_seeded_games_play_the_same_with_speculation(scripted_human):
+    prepared = 0
+    for seed in range(6):
+        name, log, _ = play(seed, speculate=False)
+        speculated_name, speculated_log, speculator = play(seed, speculate=True)
+        assert (speculated_name, speculated_log) == (name, log)
+        prepared += speculator.prepared
+    assert prepared > 0
+
+
+def test_speculation_leaves_the_cache_counts_to_the_players():
+    decision_cache.clear()
+    game = Game(renderer=NullRenderer(), seed=1)
+    game.seat_players([HumanPlayer("Stan", 3)] + [ComputerPlayer(name, 3) for name in ComputerPlayer.gambler])
+    bid = game.new_bid()
+    for player in game.players:
+        player.total_dices = bid.total_dices
+
+    computers = list(game.players)[1:]
+    speculator = Speculator()
+    speculator.start(game.players, bid)
+    # let the worker finish, as a human taking their time would
+    speculator._thread.join()
+    speculator.stop()
+    assert speculator.prepared == len(decision_cache) == len({player.odds_key(bid) for player in computers})
+    assert (decision_cache.hits, decision_cache.misses) == (0, 0)
+
+    # the players' own lookups are the only ones counted, and all of them hit
+    for player in computers:
+        assert player.bid_odds(bid) is decision_cache.get(player.odds_key(bid))
+    assert decision_cache.misses == 0
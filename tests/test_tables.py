@@ -0,0 +1,39 @@
+import pytest
+
+import probability
+import tables
+from probability import REGULAR_ODDS, WILD_ODDS, face_tail, tail_probabilities
+
+
+def test_built_table_holds_the_tail_probabilities(tmp_path):
+    path = tables.build(str(tmp_path / 'bid_tables.bin'), max_dices=12)
+    table = tables.BidTable(path)
+    try:
+        assert table.max_dices == 12
+        for is_wild_face, odds in ((False, REGULAR_ODDS), (True, WILD_ODDS)):
+            for unknown_dices in range(13):
+                row = list(table.tail(unknown_dices, is_wild_face))
+                expected = list(tail_probabilities(unknown_dices, odds))
+                assert row[:len(expected)] == pytest.approx(expected, abs=1e-15)
+                assert not any(row[len(expected):])
+        assert table.tail(13, False) is None
+    finally:
+        table.close()
+
+
+def test_loaded_table_is_read_by_the_engine(tmp_path):
+    path = tables.build(str(tmp_path / 'bid_tables.bin'), max_dices=6)
+    previous = probability._table
+    table = tables.load(path)
+    try:
+        assert probability._table is table
+        assert list(face_tail(4, 2, True)) == list(table.tail(4, True))
+        # beyond the table the rows are computed again
+        assert face_tail(9, 2, False) == tail_probabilities(9, REGULAR_ODDS)
+    finally:
+        probability.install_table(previous)
+        table.close()
+
+
+def test_load_without_a_file(tmp_path):
+    assert tables.load(str(tmp_path / 'missing.bin')) is None
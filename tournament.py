@@ -0,0 +1,166 @@
+import argparse
+import os
+import random
+import shlex
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import tables
+from batch import run_games
+from bots import BotPlayer
+from game import Game
+from gamelog import GameLog
+from players import ComputerPlayer
+from renderers import NullRenderer
+from stats import GameStats
+from streams import new_seed
+
+# the profile of the external bot, see --bot
+BOT_PROFILE = "The Outsider"
+
+
+def new_game(profiles, dices, is_wild=False, seed=None, stats=None, log=None, bot=None):
+    """
+    Seats a headless game between computer players.
+
+    Parameters:
+    - profiles (list): Names from ComputerPlayer.gambler, one per seat.
+    - dices (int): The number of dice each player starts with.
+    - is_wild (bool): Flag indicating if 1's are wild.
+    - seed (int): The game seed, the same seed and profiles replay the same game.
+    - stats (GameStats): Records the game's hot paths when given.
+    - log (GameLog): Records the game's rounds when given.
+    - bot (list): The command of the external bot playing the BOT_PROFILE seat.
+    """
+    game = Game(renderer=NullRenderer(), seed=seed, stats=stats, log=log)
+    game.seat_players([BotPlayer(profile, dices, bot) if profile == BOT_PROFILE
+                       else ComputerPlayer(name=profile, number_of_dices=dices) for profile in profiles], is_wild)
+    return game
+
+
+def play_games(games, players, dices, is_wild=False, profiles=None, seed=None, record_stats=False, record_log=False,
+               bot=None):
+    """
+    Plays a batch of games with random line-ups drawn from the profiles.
+
+    The line-ups and game seeds are drawn from the batch seed, so a batch replays from it.
+    The games are played side by side with their computer turns decided together (see batch.py).
+
+    Returns:
+    - tuple: Counters of wins and seats per profile, the total number of rounds, the GameStats
+      and the bytes of the game log, the last two only if recorded.
+    """
+    profiles = profiles or list(ComputerPlayer.gambler)
+    rng = random.Random(seed)
+    stats = GameStats() if record_stats else None
+    log = GameLog() if record_log else None
+    line_ups = []
+    games_played = []
+    for _ in range(games):
+        line_up = rng.sample(profiles, players)
+        line_ups.append(line_up)
+        games_played.append(new_game(line_up, dices, is_wild, rng.getrandbits(64), stats, log, bot))
+
+    wins = Counter(winner.name for winner in run_games(games_played))
+    seats = Counter()
+    for line_up in line_ups:
+        seats.update(line_up)
+    rounds = sum(game.turn for game in games_played)
+    return wins, seats, rounds, stats, log.getvalue() if log is not None else None
+
+
+def run_tournament(games, players=2, dices=5, is_wild=False, profiles=None, workers=None, batch_size=50,
+                   seed=None, record_stats=False, log_path=None, bot=None):
+    """
+    Spreads the games over a process pool and collects the results.
+
+    Every batch gets its own seed drawn from the tournament seed, so the results don't
+    depend on how the batches are spread over the workers. With a log_path, every round
+    is appended to the game log there, batch by batch in order. With a bot command, the
+    external bot joins the profiles; every worker keeps its bot processes for all its games.
+
+    Returns:
+    - dict: Games played, per-profile wins, seats and win rates, average rounds, games per second
+      and the merged GameStats when record_stats is set.
+    """
+    workers = workers or os.cpu_count()
+    if bot is not None:
+        profiles = (profiles or list(ComputerPlayer.gambler)) + [BOT_PROFILE]
+    batches = [batch_size] * (games // batch_size)
+    if games % batch_size:
+        batches.append(games % batch_size)
+
+    seed = new_seed() if seed is None else seed
+    rng = random.Random(seed)
+
+    wins = Counter()
+    seats = Counter()
+    rounds = 0
+    stats = GameStats() if record_stats else None
+    log = GameLog(log_path) if log_path else None
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=tables.load) as pool:
+        futures = [pool.submit(play_games, batch, players, dices, is_wild, profiles, rng.getrandbits(64),
+                               record_stats, log is not None, bot)
+                   for batch in batches]
+        for future in futures:
+            batch_wins, batch_seats, batch_rounds, batch_stats, batch_log = future.result()
+            wins.update(batch_wins)
+            seats.update(batch_seats)
+            rounds += batch_rounds
+            if stats is not None:
+                stats.merge(batch_stats)
+            if log is not None:
+                log.extend(batch_log)
+    if log is not None:
+        log.close()
+    elapsed = time.perf_counter() - start
+
+    return {
+        'seed': seed,
+        'games': games,
+        'wins': dict(wins),
+        'seats': dict(seats),
+        'win_rates': {profile: wins[profile] / seats[profile] for profile in seats},
+        'average_rounds': rounds / games if games else 0.0,
+        'seconds': elapsed,
+        'games_per_second': games / elapsed if elapsed else 0.0,
+        'stats': stats,
+    }
+
+
+def print_report(report):
+    print(f"Seed {report['seed']}: {report['games']} games in {report['seconds']:.2f}s "
+          f"({report['games_per_second']:.0f} games/s), {report['average_rounds']:.1f} rounds per game")
+    for profile, rate in sorted(report['win_rates'].items(), key=lambda x: x[1], reverse=True):
+        print(f"  {profile:<28} {rate:7.2%} of {report['seats'][profile]} games")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play computer-only games of Liar's Dice and report win rates.")
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--players', type=int, default=2, choices=range(2, len(ComputerPlayer.gambler) + 1))
+    parser.add_argument('--dice', type=int, default=5, choices=range(2, 6))
+    parser.add_argument('--wild', action='store_true')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--stats', choices=('json', 'prometheus'), default=None,
+                        help="also record the hot-path statistics and print them in this format")
+    parser.add_argument('--log', metavar='PATH', default=None, help="append every round to the game log at PATH")
+    parser.add_argument('--bot', metavar='COMMAND', default=None,
+                        help=f"seat an external bot started with COMMAND as '{BOT_PROFILE}', see bots.py")
+    args = parser.parse_args()
+
+    report = run_tournament(args.games, args.players, args.dice, args.wild, workers=args.workers, seed=args.seed,
+                            record_stats=args.stats is not None, log_path=args.log,
+                            bot=shlex.split(args.bot) if args.bot else None)
+    print_report(report)
+    if args.stats == 'json':
+        print(report['stats'].to_json())
+    elif args.stats == 'prometheus':
+        print(report['stats'].to_prometheus(), end='')
+
+
+if __name__ == '__main__':
+    main()
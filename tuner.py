@@ -0,0 +1,155 @@
+import argparse
+import math
+import os
+import random
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import tables
+from batch import run_games
+from game import Game
+from players import ComputerPlayer
+from renderers import NullRenderer
+from streams import new_seed
+
+Candidate = namedtuple('Candidate', 'threshold opening_count opening_face',
+                       defaults=(ComputerPlayer.opening_count, ComputerPlayer.opening_face))
+
+CANDIDATE_NAME = "The Candidate"
+
+
+def candidate_game(candidate, seed, players, dices, is_wild):
+    """
+    Seats the candidate against computer players with the standard profiles.
+
+    The opponents and the candidate's seat come from the seed alone, so every candidate
+    plays the same deals against the same opponents: common random numbers.
+    """
+    rng = random.Random(seed)
+    opponents = rng.sample(list(ComputerPlayer.gambler), players - 1)
+    seat = rng.randrange(players)
+    line_up = [ComputerPlayer(name=name, number_of_dices=dices) for name in opponents]
+
+    player = ComputerPlayer(CANDIDATE_NAME, dices, gambler_threshold=candidate.threshold)
+    player.opening_count = candidate.opening_count
+    player.opening_face = candidate.opening_face
+    line_up.insert(seat, player)
+
+    game = Game(renderer=NullRenderer(), seed=seed)
+    game.seat_players(line_up, is_wild)
+    return game
+
+
+def evaluate(candidate, seeds, players, dices, is_wild):
+    """ plays the candidate's games with the given seeds and returns 1 for every win, 0 for every loss """
+    games = [candidate_game(candidate, seed, players, dices, is_wild) for seed in seeds]
+    return [int(winner.name == CANDIDATE_NAME) for winner in run_games(games)]
+
+
+def clearly_worse(best, other, z):
+    """ whether the paired wins of other trail best by more than z standard errors """
+    differences = [a - b for a, b in zip(best, other)]
+    n = len(differences)
+    if n < 2:
+        return False
+    mean = sum(differences) / n
+    variance = sum((d - mean) ** 2 for d in differences) / (n - 1)
+    return mean - z * math.sqrt(variance / n) > 0
+
+
+def tune(candidates, players=2, dices=5, is_wild=False, batch_size=400, max_games=20000, z=2.58,
+         workers=None, seed=None):
+    """
+    Ranks the candidates by their win rate with successive elimination.
+
+    Every stage plays one more batch of seeded games for each remaining candidate, the same
+    seeds for all of them, spread over a process pool. The games are paired by seed, so a
+    candidate whose wins trail the leader's by more than z standard errors of the paired
+    differences is dropped. Tuning stops once one candidate remains or each has played max_games.
+
+    Returns:
+    - dict: The seed, the games played and a ranking of (candidate, win rate, games, eliminated).
+    """
+    workers = workers or os.cpu_count()
+    seed = new_seed() if seed is None else seed
+    rng = random.Random(seed)
+    wins = {candidate: [] for candidate in candidates}
+    alive = list(candidates)
+    eliminated = set()
+    played = 0
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=tables.load) as pool:
+        while len(alive) > 1 and played < max_games:
+            seeds = [rng.getrandbits(64) for _ in range(min(batch_size, max_games - played))]
+            chunk = math.ceil(len(seeds) / workers)
+            chunks = [seeds[i:i + chunk] for i in range(0, len(seeds), chunk)]
+            futures = {candidate: [pool.submit(evaluate, candidate, part, players, dices, is_wild) for part in chunks]
+                       for candidate in alive}
+            for candidate, parts in futures.items():
+                for future in parts:
+                    wins[candidate].extend(future.result())
+            played += len(seeds)
+
+            leader = max(alive, key=lambda candidate: sum(wins[candidate]))
+            for candidate in alive:
+                if candidate != leader and clearly_worse(wins[leader], wins[candidate], z):
+                    eliminated.add(candidate)
+            alive = [candidate for candidate in alive if candidate not in eliminated]
+
+    ranking = sorted(((candidate, sum(results) / len(results), len(results), candidate in eliminated)
+                      for candidate, results in wins.items()),
+                     key=lambda entry: (entry[3], -entry[1]))
+    return {
+        'seed': seed,
+        'games': sum(len(results) for results in wins.values()),
+        'seconds': time.perf_counter() - start,
+        'ranking': ranking,
+    }
+
+
+def grid(thresholds, opening_counts=None, opening_faces=None):
+    return [Candidate(round(threshold, 4), count, face)
+            for threshold in thresholds
+            for count in opening_counts or (ComputerPlayer.opening_count,)
+            for face in opening_faces or (ComputerPlayer.opening_face,)]
+
+
+def frange(spec):
+    """ 'start:stop:step' with stop included """
+    start, stop, step = (float(part) for part in spec.split(':'))
+    return [start + i * step for i in range(int(round((stop - start) / step)) + 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune the computer player's gamble threshold and opening bids.")
+    parser.add_argument('--players', type=int, default=2, choices=range(2, len(ComputerPlayer.gambler) + 2))
+    parser.add_argument('--dice', type=int, default=5, choices=range(2, 6))
+    parser.add_argument('--wild', action='store_true')
+    parser.add_argument('--thresholds', default='0.2:0.7:0.05', help="start:stop:step, stop included")
+    parser.add_argument('--openings', action='store_true',
+                        help="also search the highest opening count (1-4) and face (2-4)")
+    parser.add_argument('--batch', type=int, default=400, help="games per candidate and stage")
+    parser.add_argument('--max-games', type=int, default=20000, help="games per candidate at most")
+    parser.add_argument('--z', type=float, default=2.58, help="standard errors behind the leader to drop a candidate")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    if args.openings:
+        candidates = grid(frange(args.thresholds), range(1, 5), range(2, 5))
+    else:
+        candidates = grid(frange(args.thresholds))
+
+    report = tune(candidates, args.players, args.dice, args.wild, args.batch, args.max_games, args.z,
+                  args.workers, args.seed)
+    print(f"Seed {report['seed']}: {len(candidates)} candidates, {report['games']} games in {report['seconds']:.1f}s")
+    for candidate, rate, games, dropped in report['ranking']:
+        status = f"dropped after {games} games" if dropped else f"{games} games"
+        print(f"  threshold {candidate.threshold:.2f}, opening up to {candidate.opening_count} "
+              f"of face {candidate.opening_face}: {rate:7.2%} ({status})")
+
+
+if __name__ == '__main__':
+    main()